@@ -0,0 +1,268 @@
+"""End-to-end crawl benchmark against a local, deterministic synthetic web.
+
+Starts an HTTP server serving a generated link graph, crawls it with
+WebCrawler and writes pages/s, per-page latency percentiles, the time spent
+in each pipeline stage and peak RSS as JSON. Run from the project root:
+    python -m benchmarks.crawl_benchmark --pages 500 --fanout 8 --output bench.json
+    python -m benchmarks.crawl_benchmark --output new.json --baseline bench.json
+    python -m benchmarks.crawl_benchmark --keywords crawler network search --output multi.json --baseline bench.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
+
+FILLER_WORDS = (
+    "network data system page search index query result server client protocol document archive "
+    "library science history music travel sport market energy health garden weather river city"
+).split()
+
+STAGES = ("robots", "politeness_wait", "fetch", "parse", "relevance", "prefilter", "clean", "similarity", "db_queue",
+          "db_write")
+
+
+class SyntheticWeb:
+    """A deterministic link graph: the same arguments always serve the same pages.
+
+    Page ``i`` links to ``fanout`` other pages chosen by a generator seeded with
+    ``i``; a share of the links point under /private/, which robots.txt
+    disallows. Bodies are padded with filler words up to ``page_kb`` and
+    mention the keyword at a page-specific rate.
+    """
+
+    def __init__(self, pages=500, fanout=8, page_kb=20, latency_ms=0, crawl_delay=0, private_share=0.1,
+                 keyword="crawler", seed=0):
+        self.pages = pages
+        self.fanout = fanout
+        self.page_kb = page_kb
+        self.latency = latency_ms / 1000
+        self.crawl_delay = crawl_delay
+        self.private_share = private_share
+        self.keyword = keyword
+        self.seed = seed
+
+    def robots_txt(self):
+        lines = ["User-agent: *", "Disallow: /private/"]
+        if self.crawl_delay:
+            lines.append(f"Crawl-delay: {self.crawl_delay}")
+        return "\n".join(lines) + "\n"
+
+    def page(self, index):
+        rng = random.Random(self.seed * 1_000_003 + index)
+        keyword_rate = rng.random() * 0.05
+        words = [self.keyword if rng.random() < keyword_rate else rng.choice(FILLER_WORDS) for _ in range(64)]
+
+        parts = [f"<html><head><title>Page {index}</title></head><body><h1>Page {index}</h1>"]
+        for _ in range(self.fanout):
+            target = rng.randrange(self.pages)
+            prefix = "private" if rng.random() < self.private_share else "page"
+            context = " ".join(rng.choice(words) for _ in range(12))
+            parts.append(f"<p>{context} <a href=\"/{prefix}/{target}\">{rng.choice(words)} {target}</a> "
+                         f"{' '.join(rng.choice(words) for _ in range(12))}</p>")
+
+        size = len("".join(parts))
+        while size < self.page_kb * 1024:
+            paragraph = "<p>" + " ".join(rng.choice(words) for _ in range(60)) + "</p>"
+            parts.append(paragraph)
+            size += len(paragraph)
+        parts.append("</body></html>")
+        return "".join(parts)
+
+    def etag(self, index):
+        return '"' + hashlib.blake2b(f"{self.seed}:{index}".encode(), digest_size=8).hexdigest() + '"'
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Start serving on a background thread; returns the server (see ``server_address``)."""
+        web = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if web.latency:
+                    time.sleep(web.latency)
+                if self.path == "/robots.txt":
+                    return self._send(200, web.robots_txt(), "text/plain")
+                prefix, _, number = self.path.strip("/").partition("/")
+                if prefix not in ("page", "private") or not number.isdigit() or int(number) >= web.pages:
+                    return self._send(404, "not found", "text/plain")
+                etag = web.etag(int(number))
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, "", "text/html", etag)
+                return self._send(200, web.page(int(number)), "text/html; charset=utf-8", etag)
+
+            def _send(self, status, body, content_type, etag=None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="synthetic-web", daemon=True).start()
+        return server
+
+
+def peak_rss_mb():
+    """Peak RSS of this process and of its (waited-for) children, in MB."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is reported in KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return round(own, 1), round(children, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_crawl(args, seed_url):
+    """Crawl the synthetic web once in a scratch directory and return the report."""
+    # Imported here so --help works without the crawl dependencies
+    from src.crawler import crawler as crawler_module
+    from src.crawler.metrics import get_metrics
+    from src.crawler.politeness import PolitenessScheduler
+    from src.crawler.robots_cache import RobotsCache
+
+    # The crawler writes its databases to the working directory, so run it in a scratch one;
+    # keep the project importable from there, including in spawned scoring workers
+    sys.path.insert(0, os.getcwd())
+    workdir = tempfile.mkdtemp(prefix="crawl_benchmark_")
+    os.chdir(workdir)
+    crawler_module.initialize_database()
+    metrics = get_metrics()
+    metrics.reset()
+
+    crawler = crawler_module.WebCrawler(
+        [seed_url], args.keywords or args.keyword, args.max_depth, args.max_horizon,
+        scoring_workers=args.scoring_workers, scoring_backend=args.scoring_backend,
+        fetch_batch_size=args.fetch_batch_size,
+        politeness=PolitenessScheduler(default_delay=0), robots_cache=RobotsCache(),
+        recrawl=args.recrawl, page_cache_path=args.page_cache, frontier_mode=args.frontier_mode,
+    )
+    start = time.perf_counter()
+    crawler.start(log_file=os.path.join(workdir, "crawl.txt"), strategy=args.strategy)
+    elapsed = time.perf_counter() - start
+
+    conn = crawler_module.connect_results_db("results.sqlite3")
+    pages = conn.execute("SELECT COUNT(*) FROM CrawlResults").fetchone()[0]
+    conn.close()
+
+    snapshot = metrics.snapshot()
+    histograms = snapshot["histograms"]
+    stages = {stage: histograms.get(f"{stage}_seconds", {"count": 0, "sum": 0.0}) for stage in STAGES}
+    staged_sec = sum(stage["sum"] for stage in stages.values()) or 1.0
+    for stage in stages.values():
+        stage["share"] = round(stage["sum"] / staged_sec, 4)
+
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "pages": pages,
+        "elapsed_sec": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 3) if elapsed else 0.0,
+        "page_latency_sec": histograms.get("page_seconds", {}),
+        "fetch_latency_sec": histograms.get("fetch_seconds", {}),
+        "stages": stages,
+        "counters": snapshot["counters"],
+        "peak_rss_mb": own_rss,
+        "peak_rss_children_mb": children_rss,
+        "workdir": workdir,
+    }
+
+
+def compare(report, baseline):
+    """Print how the headline numbers moved against an earlier report."""
+    def ratio(new, old):
+        return f"{new / old:.2f}x" if old else "n/a"
+
+    print(f"\nAgainst baseline {baseline.get('git_commit')}:")
+    print(f"  pages/s     {baseline['pages_per_sec']:>10} -> {report['pages_per_sec']:>10} "
+          f"({ratio(report['pages_per_sec'], baseline['pages_per_sec'])})")
+    for key in ("page_latency_sec", "fetch_latency_sec"):
+        for q in ("p50", "p95"):
+            old, new = baseline[key].get(q, 0.0), report[key].get(q, 0.0)
+            print(f"  {key[:-12]} {q:<5} {old:>10} -> {new:>10} ({ratio(new, old)})")
+    print(f"  peak RSS MB {baseline['peak_rss_mb']} -> {report['peak_rss_mb']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500, help="pages in the synthetic web")
+    parser.add_argument("--fanout", type=int, default=8, help="links per page")
+    parser.add_argument("--page-kb", type=int, default=20, help="approximate size of each page")
+    parser.add_argument("--latency-ms", type=float, default=0, help="server-side delay per request")
+    parser.add_argument("--crawl-delay", type=float, default=0, help="Crawl-delay announced in robots.txt")
+    parser.add_argument("--private-share", type=float, default=0.1, help="share of links disallowed by robots.txt")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keyword", default="crawler")
+    parser.add_argument("--keywords", nargs="+", default=None,
+                        help="score these keywords together instead of --keyword (it still seeds the pages)")
+    parser.add_argument("--frontier-mode", choices=("combined", "per_keyword"), default="combined")
+    parser.add_argument("--max-depth", type=int, default=2)
+    parser.add_argument("--max-horizon", type=int, default=8)
+    parser.add_argument("--strategy", choices=("best_first", "recursive"), default="best_first")
+    parser.add_argument("--scoring-backend", choices=("process", "thread"), default="process")
+    parser.add_argument("--scoring-workers", type=int, default=4)
+    parser.add_argument("--fetch-batch-size", type=int, default=10)
+    parser.add_argument("--recrawl", action="store_true", help="use the page cache (run twice to measure reuse)")
+    parser.add_argument("--page-cache", default="crawl_benchmark_pages.sqlite3", help="page cache used by --recrawl")
+    parser.add_argument("--output", default="crawl_benchmark.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", default=None, help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    args.page_cache = os.path.abspath(args.page_cache)
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    web = SyntheticWeb(args.pages, args.fanout, args.page_kb, args.latency_ms, args.crawl_delay,
+                       args.private_share, args.keyword, args.seed)
+    server = web.serve()
+    host, port = server.server_address[:2]
+    commit = git_commit()
+    try:
+        report = run_crawl(args, f"http://{host}:{port}/page/0")
+    finally:
+        server.shutdown()
+
+    report = {"git_commit": commit, "config": vars(args), **report}
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{report['pages']} pages in {report['elapsed_sec']} s: {report['pages_per_sec']} pages/s")
+    print(f"page latency p50/p95: {report['page_latency_sec'].get('p50')} / {report['page_latency_sec'].get('p95')} s")
+    print(f"{'stage':>16} {'count':>7} {'total s':>9} {'share':>7}")
+    for name, stage in report["stages"].items():
+        print(f"{name:>16} {stage['count']:>7} {stage['sum']:>9.3f} {stage.get('share', 0):>7.1%}")
+    print(f"peak RSS: {report['peak_rss_mb']} MB (children {report['peak_rss_children_mb']} MB)")
+    print(f"report written to {output}")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as file:
+            compare(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Startup benchmark: import times, model load time and the cost of adding workers.
+
+Import and model-load times are measured in fresh interpreters. Worker
+scale-up compares N freshly spawned processes that each load the model against
+N children forked from a parent that loaded it once and froze it (the
+copy-on-write setup behind ``--pool prefork``). Run from the project root:
+    python -m benchmarks.startup_benchmark --workers 1 4 8 --output startup.json
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = (
+    "src.crawler.view_sqlite3",
+    "src.crawler.metrics",
+    "src.crawler.crawler",
+    "src.crawler.scoring_pool",
+    "src.models.similarities",
+    "spacy",
+)
+
+
+def import_time(module, repeat):
+    """Median seconds to import a module in a fresh interpreter, or None if it fails."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return round(statistics.median(times), 4)
+
+
+def model_load(model_name):
+    code = ("import json; from src.models.model_registry import preload; "
+            f"print(json.dumps(preload({model_name!r})))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def memory_mb():
+    """Private and shared resident memory of this process in MB (Linux only)."""
+    private = shared = 0
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as file:
+            for line in file:
+                name, _, value = line.partition(":")
+                if name in ("Private_Clean", "Private_Dirty"):
+                    private += int(value.split()[0])
+                elif name in ("Shared_Clean", "Shared_Dirty"):
+                    shared += int(value.split()[0])
+    except OSError:
+        return None, None
+    return round(private / 1024, 1), round(shared / 1024, 1)
+
+
+def _worker(model_name, preloaded, results):
+    start = time.perf_counter()
+    if not preloaded:
+        from src.models.model_registry import preload
+        preload(model_name)
+    from src.models.model_registry import get_spacy_model
+    get_spacy_model(model_name)("Warm up the pipeline on one short sentence.")
+    private, shared = memory_mb()
+    results.put({"ready_sec": time.perf_counter() - start, "private_mb": private, "shared_mb": shared})
+
+
+def scale_up(mode, workers, model_name):
+    """Start ``workers`` model-holding processes; returns wall time and memory per child."""
+    if mode == "fork":
+        from src.models.model_registry import preload
+        preload(model_name)
+        gc.collect()
+        gc.freeze()
+    context = multiprocessing.get_context("fork" if mode == "fork" else "spawn")
+    results = context.Queue()
+
+    start = time.perf_counter()
+    processes = [context.Process(target=_worker, args=(model_name, mode == "fork", results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    children = [results.get() for _ in processes]
+    wall_sec = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    if mode == "fork":
+        gc.unfreeze()
+
+    private = [child["private_mb"] for child in children if child["private_mb"] is not None]
+    return {
+        "workers": workers,
+        "wall_sec": round(wall_sec, 3),
+        "mean_private_mb": round(statistics.mean(private), 1) if private else None,
+        "mean_shared_mb": round(statistics.mean(child["shared_mb"] for child in children), 1) if private else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per import measurement")
+    parser.add_argument("--model", default="en_core_web_md")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--skip-scale-up", action="store_true")
+    parser.add_argument("--output", default=None, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    report = {"imports_sec": {}, "model_load": None, "scale_up": []}
+    print(f"{'module':>28} {'import s':>9}")
+    for module in args.modules:
+        seconds = import_time(module, args.repeat)
+        report["imports_sec"][module] = seconds
+        print(f"{module:>28} {seconds if seconds is not None else 'failed':>9}")
+
+    report["model_load"] = model_load(args.model)
+    print(f"\nModel load in a fresh interpreter: {report['model_load']}")
+
+    if not args.skip_scale_up:
+        print(f"\n{'mode':>6} {'workers':>8} {'wall s':>8} {'private MB':>11} {'shared MB':>10}")
+        # Spawned runs first, so the forked runs' preload does not leak into them
+        for mode in ("spawn", "fork"):
+            for workers in args.workers:
+                result = dict(scale_up(mode, workers, args.model), mode=mode)
+                report["scale_up"].append(result)
+                print(f"{mode:>6} {workers:>8} {result['wall_sec']:>8} {result['mean_private_mb']!s:>11} "
+                      f"{result['mean_shared_mb']!s:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Micro-benchmark: indexed TopValues against the original list-scanning version.
+
+Run from the project root:
+    python -m benchmarks.topvals_benchmark --sizes 10 100 1000 10000 100000 1000000
+"""
+import argparse
+import heapq
+import random
+import time
+
+from src.models.topVals import TopValues
+
+
+class LegacyTopValues:
+    """The original TopValues, kept here only as the benchmark baseline."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.heap = []
+
+    def add(self, value):
+        if value[0] in [t[1] for t in self.heap]:
+            return
+
+        if len(self.heap) < self.capacity:
+            heapq.heappush(self.heap, (value[1], value[0]))
+        else:
+            heapq.heappushpop(self.heap, (value[1], value[0]))
+
+    def get_top_values(self):
+        return sorted(self.heap, reverse=True)
+
+    def remove_from_heap(self, value):
+        try:
+            index = self.heap.index(value)
+            self.heap[index] = self.heap[-1]
+            self.heap.pop()
+            if index < len(self.heap):
+                heapq._siftup(self.heap, index)
+                heapq._siftdown(self.heap, 0, index)
+        except ValueError:
+            pass
+
+    def pop_highest(self):
+        if self.heap:
+            to_return = heapq.nlargest(1, self.heap).pop()
+            self.remove_from_heap(to_return)
+        return to_return
+
+
+def run_once(cls, horizon, seed):
+    """Insert 2 * horizon links (so half get evicted), then pop the queue empty."""
+    rng = random.Random(seed)
+    values = [(f"https://example.com/{i}", rng.random()) for i in range(2 * horizon)]
+
+    queue = cls(horizon)
+    start = time.perf_counter()
+    for value in values:
+        queue.add(value)
+    insert_sec = time.perf_counter() - start
+
+    pops = len(queue.heap)
+    start = time.perf_counter()
+    for _ in range(pops):
+        queue.pop_highest()
+    pop_sec = time.perf_counter() - start
+    return insert_sec, pop_sec, len(values), pops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--legacy-limit", type=int, default=10000,
+                        help="largest horizon to run the legacy class at (it is quadratic)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'horizon':>9} {'impl':>7} {'insert us/op':>13} {'pop us/op':>10} {'total s':>9}")
+    for size in args.sizes:
+        for name, cls in (("indexed", TopValues), ("legacy", LegacyTopValues)):
+            if cls is LegacyTopValues and size > args.legacy_limit:
+                print(f"{size:>9} {name:>7} {'skipped (above --legacy-limit)':>34}")
+                continue
+            insert_sec, pop_sec, inserts, pops = run_once(cls, size, args.seed)
+            print(f"{size:>9} {name:>7} {insert_sec / inserts * 1e6:>13.2f} "
+                  f"{pop_sec / max(pops, 1) * 1e6:>10.2f} {insert_sec + pop_sec:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from src.crawler.metrics import get_metrics, timed
+from src.crawler.fetch_limits import BodyReader, FetchLimits, FetchStats, content_length
+from src.crawler.page_cache import FetchedPage, conditional_headers
+from src.crawler.politeness import PolitenessScheduler
+from src.crawler.robots_cache import RobotsCache
+
+
+class AsyncFetcher:
+    """Fetch many pages concurrently over pooled keep-alive connections.
+
+    Applies the same robots.txt and per-host crawl-delay rules as
+    ``WebCrawler.fetch_page``. Pass the crawler's ``robots_cache`` and
+    ``PolitenessScheduler`` to share politeness state with it.
+    """
+
+    def __init__(self, user_agent="MyCrawler", max_concurrency=50, per_host_concurrency=2,
+                 timeout=10, robots_timeout=5, default_delay=1, robots_cache=None, politeness=None,
+                 limits=None, stats=None):
+        self.user_agent = user_agent
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.default_delay = default_delay
+        self.limits = limits if limits is not None else FetchLimits()
+        self.stats = stats if stats is not None else FetchStats()
+        self.robots_cache = robots_cache if robots_cache is not None else RobotsCache(user_agent, timeout=robots_timeout)
+        self.politeness = politeness if politeness is not None else PolitenessScheduler(default_delay)
+        self.session = None
+        self._global_limit = None
+        self._host_limits = {}
+
+    async def __aenter__(self):
+        # The connector keeps a keep-alive pool per host and caps connections globally
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host_concurrency,
+            keepalive_timeout=30,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout,
+        )
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def _host_limit(self, base_url):
+        if base_url not in self._host_limits:
+            self._host_limits[base_url] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[base_url]
+
+    async def get_robot_parser(self, base_url):
+        """Get the Robots parser for a base URL from the shared cache.
+
+        Misses are fetched on a worker thread so that concurrent lookups from
+        crawler threads and this event loop all share one fetch per host.
+        """
+        loop = asyncio.get_running_loop()
+        with timed("robots"):
+            return await loop.run_in_executor(None, self.robots_cache.get, base_url)
+
+    async def _wait_for_politeness(self, base_url, parser):
+        """Wait out the crawl delay for a host without blocking other hosts."""
+        self.politeness.update_from_robots(base_url, parser, self.user_agent)
+        waited = await self.politeness.acquire_async(base_url)
+        get_metrics().observe("politeness_wait_seconds", waited)
+        if waited:
+            logging.info(f"Rate limited {base_url}: waited {waited:.2f} seconds")
+
+    async def _read_body(self, url, response, truncate=False):
+        """Stream the body within the fetch limits, decoding it incrementally."""
+        limits = self.limits
+        declared_length = content_length(response.headers)
+        reason = limits.check_headers(response.headers)
+        if reason is not None:
+            self.stats.record_skip(reason, declared_length)
+            logging.info(f"Skipping {url} ({reason}): {response.headers.get('Content-Type')}, {declared_length} bytes")
+            return None
+
+        reader = BodyReader(limits, response.charset, declared_length, truncate)
+        async for chunk in response.content.iter_chunked(limits.chunk_size):
+            if not reader.feed(chunk):
+                break
+        html = reader.finish(self.stats)
+        if html is None:
+            logging.info(f"Skipping {url}: body exceeded {limits.max_bytes} bytes")
+        return html
+
+    async def fetch(self, url):
+        """Fetch the HTML content of a page, or None if it is disallowed or fails."""
+        fetched = await self.fetch_conditional(url)
+        return fetched.html if fetched is not None else None
+
+    async def fetch_conditional(self, url, cached=None, truncate=False):
+        """Fetch a page, revalidating it against a CachedPage if one is given.
+
+        Returns a FetchedPage (status 304 with no body if the cached copy is
+        still current) with its own fetch time, or None if the page is
+        disallowed or fails. With ``truncate`` only the first ``head_bytes`` of
+        the body are read, for pages whose links will not be followed.
+        """
+        start = time.perf_counter()
+        fetched = await self._fetch_conditional(url, cached, truncate)
+        if fetched is not None:
+            fetched = fetched._replace(fetch_sec=time.perf_counter() - start)
+        return fetched
+
+    async def _fetch_conditional(self, url, cached, truncate):
+        parsed_url = urlparse(url)
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        host_limit = self._host_limit(base_url)
+        metrics = get_metrics()
+
+        try:
+            parser = await self.get_robot_parser(base_url)
+            if not parser.is_allowed(self.user_agent, url):
+                logging.info(f"Disallowed by robots.txt: {url}")
+                metrics.inc("robots_disallowed")
+                return None
+
+            async with host_limit:
+                await self._wait_for_politeness(base_url, parser)
+                async with self._global_limit:
+                    with metrics.timer("fetch"):
+                        async with self.session.get(url, headers=conditional_headers(cached)) as response:
+                            metrics.inc(f"http_{response.status}")
+                            if response.status == 304 and cached is not None:
+                                return FetchedPage(304, None, response.headers.get("ETag"),
+                                                   response.headers.get("Last-Modified"))
+                            if response.status != 200:
+                                logging.warning(f"Non-200 status code {response.status} for URL: {url}")
+                                return None
+                            html = await self._read_body(url, response, truncate)
+                            if html is None:
+                                return None
+                            return FetchedPage(200, html, response.headers.get("ETag"),
+                                               response.headers.get("Last-Modified"))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to fetch {url}: {e}")
+            metrics.inc("fetch_errors")
+        return None
+
+    async def fetch_many(self, urls):
+        """Fetch all URLs concurrently, returning {url: html or None}."""
+        urls = list(urls)
+        pages = await asyncio.gather(*(self.fetch(url) for url in urls))
+        return dict(zip(urls, pages))
+
+    async def fetch_many_conditional(self, urls, cached, truncate=()):
+        """Like fetch_many with fetch_conditional, returning {url: FetchedPage or None}.
+
+        Bodies of the URLs in ``truncate`` are cut at the limits' head_bytes.
+        """
+        urls = list(urls)
+        pages = await asyncio.gather(*(self.fetch_conditional(url, cached.get(url), url in truncate) for url in urls))
+        return dict(zip(urls, pages))
@@ -0,0 +1,84 @@
+import logging
+import os
+import pickle
+import sqlite3
+import time
+
+from src.crawler.result_sink import connect
+
+CHECKPOINT_VERSION = 3
+
+
+class Checkpointer:
+    """Periodically write a crawl's resumable state to a SQLite file.
+
+    The state holds the frontier's heaps and the seen stores' own arrays (hash
+    slots or Bloom bits) as raw bytes, so neither saving nor resuming touches
+    URLs one at a time: restoring a store is one read and a memory copy, and
+    resuming takes about as long after a million pages as after a thousand.
+    Each save replaces the state in one transaction, so an interrupted save
+    leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, path, interval=60):
+        self.path = path
+        self.interval = interval
+        self.last_saved = time.time()
+        self.saves = 0
+
+    def due(self):
+        return self.interval is not None and time.time() - self.last_saved >= self.interval
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _connect(self):
+        conn = connect(self.path)
+        conn.execute("CREATE TABLE IF NOT EXISTS CheckpointState (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        return conn
+
+    def reset(self):
+        """Forget any earlier checkpoint, for a crawl that starts from its seeds."""
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def save(self, state):
+        """Replace the saved state with ``state``."""
+        started = time.time()
+        state = dict(state, version=CHECKPOINT_VERSION, saved_at=started)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO CheckpointState (key, value) VALUES ('state', ?)",
+                             (pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),))
+        finally:
+            conn.close()
+        self.last_saved = time.time()
+        self.saves += 1
+        logging.info(f"Checkpoint saved to {self.path} in {self.last_saved - started:.3f} seconds")
+
+    def load(self):
+        """Return the saved state, or None if there is no usable checkpoint."""
+        if not self.exists():
+            return None
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM CheckpointState WHERE key = 'state'").fetchone()
+                if row is None:
+                    return None
+                state = pickle.loads(row[0])
+                if state.get("version") != CHECKPOINT_VERSION:
+                    logging.error(f"Checkpoint {self.path} has version {state.get('version')}, "
+                                  f"expected {CHECKPOINT_VERSION}")
+                    return None
+            finally:
+                conn.close()
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            logging.error(f"Failed to load checkpoint from {self.path}: {e}")
+            return None
+        logging.info(f"Loaded checkpoint from {self.path} saved at {state['saved_at']}")
+        return state
@@ -1,20 +1,35 @@
-import csv
-import time
+import argparse
+import asyncio
+import gc
+import json
 import os
 import sys
 import time
-import sqlite3
 from subprocess import Popen
 from celery import Celery, group, signals
-from src.models.similarities import calculate_similarities, clean_words, clean_html
 from src.models.topVals import TopValues
+from src.crawler.scoring_pool import get_scoring_executor, shutdown_scoring_executor
+from src.models.similarity_cache import (DEFAULT_MAXSIZE, configure_similarity_cache, get_similarity_cache,
+                                         worker_cache_path)
+from src.crawler.frontier import Frontier, MultiFrontier
+from src.crawler.checkpoint import Checkpointer
+from src.crawler.metrics import (enable_profiler, get_metrics, get_profiler, start_metrics_exporter,
+                                 stop_metrics_exporter, timed)
+from src.crawler.link_filter import LinkFilter
+from src.crawler.page_cache import DEFAULT_PAGE_CACHE_PATH, FetchedPage, PageCache, conditional_headers
+from src.crawler.url_store import SQLiteSeenStore, host_partition, make_url_store, seen_urls
+from src.crawler.page_parser import PageRecord, parse_page
+from src.crawler.politeness import get_shared_politeness
+from src.crawler.robots_cache import get_shared_robots_cache
+from src.crawler.fetch_limits import DEFAULT_ALLOWED_TYPES, BodyReader, FetchLimits, FetchStats, content_length
+from src.crawler.reports import ensure_indexes, export as export_report
+from src.crawler.result_sink import (KEYWORD_SCORES_SQL, close_result_sinks, connect as connect_results_db,
+                                     get_result_sink)
 from urllib.parse import urljoin, urlparse
-import requests
-from bs4 import BeautifulSoup
-from bs4.element import Comment
-from multiprocessing import Pool
 import logging
-from robotexclusionrulesparser import RobotExclusionRulesParser
+
+# spaCy, aiohttp and requests are imported inside the stages that use them, so the process that
+# launches workers starts fast (measured by benchmarks/startup_benchmark.py)
 
 
 # Configure Celery with RabbitMQ as broker and SQLite as backend
@@ -40,6 +55,8 @@ logging.basicConfig(
 )
 # Worker-specific start time
 WORKER_START_TIME = None
+# Prefork workers already hold the model in every child, so they score on threads instead
+DEFAULT_SCORING_BACKEND = os.environ.get("CRAWLER_SCORING_BACKEND", "process")
 
 @signals.worker_init.connect
 def set_worker_start_time(**kwargs):
@@ -47,9 +64,75 @@ def set_worker_start_time(**kwargs):
     WORKER_START_TIME = time.time()
     logging.info(f"Worker initialized at {WORKER_START_TIME}")
 
+    # Load the spaCy model once up front so tasks never pay for it
+    from src.models.model_registry import preload as preload_models
+    stats = preload_models()
+    logging.info(f"Preloaded spaCy model for worker: {stats}")
+
+    # With the prefork pool this runs in the parent before it forks, so the children share the
+    # model copy-on-write. Freezing keeps the garbage collector from writing to (and so copying)
+    # the pages holding it.
+    if os.environ.get("CRAWLER_POOL") == "prefork":
+        gc.collect()
+        gc.freeze()
+        logging.info(f"Froze {gc.get_freeze_count()} objects for copy-on-write sharing")
+    else:
+        start_worker_telemetry()
+
+@signals.worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Prefork children run the tasks, so each gets its own exporter thread and profile file
+    start_worker_telemetry()
+
+def start_worker_telemetry():
+    # Optional telemetry, switched on per worker through its environment (see start_celery_worker)
+    metrics_file = os.environ.get("CRAWLER_METRICS_FILE")
+    if metrics_file:
+        start_metrics_exporter(metrics_file.format(pid=os.getpid()),
+                               float(os.environ.get("CRAWLER_METRICS_INTERVAL", 30)),
+                               os.environ.get("CRAWLER_METRICS_FORMAT", "json"))
+    profile_dir = os.environ.get("CRAWLER_PROFILE_DIR")
+    if profile_dir:
+        enable_profiler(profile_dir)
+
+@signals.task_prerun.connect
+def start_task_profile(**kwargs):
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.start()
+
+@signals.task_postrun.connect
+def stop_task_profile(**kwargs):
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.stop()
+
+@signals.worker_shutdown.connect
+def stop_scoring_executor(**kwargs):
+    shutdown_scoring_executor()
+    get_similarity_cache().save()
+    release_worker_resources()
+
+@signals.worker_process_shutdown.connect
+def stop_worker_process(**kwargs):
+    # With --pool=prefork worker_shutdown fires only in the parent; this runs in each child as it exits
+    shutdown_scoring_executor()
+    cache = get_similarity_cache()
+    if cache.path:
+        # Children save beside the main file so they do not overwrite each other; the next load merges them
+        cache.save(worker_cache_path(cache.path))
+    release_worker_resources()
+
+def release_worker_resources():
+    close_result_sinks()
+    stop_metrics_exporter()
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.dump()
+
 # SQLite Database Setup
 def initialize_database():
-    conn = sqlite3.connect("results.sqlite3")
+    conn = connect_results_db("results.sqlite3")
     cursor = conn.cursor()
     cursor.execute('''CREATE TABLE IF NOT EXISTS CrawlResults (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,72 +144,172 @@ def initialize_database():
                         duration_sec REAL NOT NULL,
                         total_duration_sec REAL NOT NULL
                       )''')
+    # Score of every page for every keyword of a multi-keyword crawl; CrawlResults keeps the best of them
+    cursor.execute('''CREATE TABLE IF NOT EXISTS KeywordScores (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        url TEXT NOT NULL,
+                        depth INTEGER NOT NULL,
+                        keyword TEXT NOT NULL,
+                        relevance_score REAL NOT NULL
+                      )''')
     conn.commit()
+    ensure_indexes(conn)
     conn.close()
 
 
 def insert_crawl_result(url, depth, links_found, relevance_score, context_snippet, duration_sec, total_duration_sec):
-    conn = sqlite3.connect("results.sqlite3")
-    cursor = conn.cursor()
-    cursor.execute('''INSERT INTO CrawlResults (url, depth, links_found, relevance_score, context_snippet, duration_sec, total_duration_sec)
-                      VALUES (?, ?, ?, ?, ?, ?, ?)''', 
-                      (url, depth, links_found, relevance_score, context_snippet, duration_sec, total_duration_sec))
-    conn.commit()
-    conn.close()
-
-def purge_backend_and_queue():
-    """Purge Celery queue and backend."""
+    """Queue a row for the batched writer thread; it is committed within a second."""
+    with timed("db_queue"):
+        get_result_sink("results.sqlite3").put(
+            (url, depth, links_found, relevance_score, context_snippet, duration_sec, total_duration_sec))
+
+def insert_keyword_scores(url, depth, keywords, scores):
+    """Queue a page's per-keyword scores; written by the same batched writer as CrawlResults."""
+    with timed("db_queue"):
+        sink = get_result_sink("results.sqlite3")
+        for keyword, score in zip(keywords, scores):
+            sink.put((url, depth, keyword, round(score, 4)), KEYWORD_SCORES_SQL)
+
+def purge_backend_and_queue(partitions=0):
+    """Purge Celery queue and backend, and the frontier.N queues of the first ``partitions`` partitions."""
     try:
         # Purge Celery task queue
         app.control.purge()
         logging.info("Purged Celery task queue.")
 
-        # Remove SQLite backend file
-        backend_file = "results.sqlite3"
-        if os.path.exists(backend_file):
-            os.remove(backend_file)
-            logging.info(f"Removed SQLite backend file: {backend_file}")
+        # control.purge only knows the default queue; batches left in partition queues would be re-run
+        with app.connection_for_write() as conn:
+            for partition in range(partitions):
+                queue = frontier_queue(partition)
+                # A fresh channel per queue: purging one that was never declared closes its channel
+                with conn.channel() as channel:
+                    try:
+                        purged = channel.queue_purge(queue)
+                        logging.info(f"Purged {purged or 0} tasks from {queue}.")
+                    except conn.channel_errors:
+                        logging.info(f"No {queue} queue to purge.")
+
+        # Remove SQLite backend file and the distributed crawl's seen URLs
+        for backend_file in ("results.sqlite3", "seen.sqlite3"):
+            if os.path.exists(backend_file):
+                os.remove(backend_file)
+                logging.info(f"Removed SQLite backend file: {backend_file}")
     except Exception as e:
         logging.error(f"Error while purging backend and queue: {e}")
 
 class WebCrawler:
-    def __init__(self, seed_urls, word, max_depth=2, max_horizon=100, user_agent="MyCrawler"):
+    def __init__(self, seed_urls, word, max_depth=2, max_horizon=100, user_agent="MyCrawler",
+                 scorer=None, scoring_workers=10, scoring_backend=DEFAULT_SCORING_BACKEND,
+                 similarity_cache_size=DEFAULT_MAXSIZE, similarity_cache_path=None,
+                 fetch_concurrency=50, per_host_concurrency=2, fetch_timeout=10, fetch_batch_size=10,
+                 visited_store="exact", visited_capacity=100_000, visited_error_rate=0.001, visited_path=None,
+                 fetch_max_kb=2048, fetch_head_kb=None, allowed_content_types=DEFAULT_ALLOWED_TYPES,
+                 politeness=None, robots_cache=None, robots_db_path=None, visited=None,
+                 checkpoint_path=None, checkpoint_interval=60, recrawl=False,
+                 page_cache_path=DEFAULT_PAGE_CACHE_PATH, prefilter_links=True, link_top_k=None, link_scope=None,
+                 precompute_relevance=True, frontier_mode="combined"):
+        # One keyword, or a list of them scored together in one pass over each page
         self.target_word = word
+        self.keywords = [word] if isinstance(word, str) else list(word)
+        self.multi_keyword = not isinstance(word, str)
+        if frontier_mode not in ("combined", "per_keyword"):
+            raise ValueError(f"Unknown frontier mode '{frontier_mode}', expected 'combined' or 'per_keyword'")
+        # combined: one frontier ranked by a link's best keyword score; per_keyword: one frontier per keyword
+        self.frontier_mode = frontier_mode if self.multi_keyword else "combined"
         self.max_horizon = max_horizon
         self.frontier = seed_urls  # List of URLs to crawl
-        self.visited = set()  # Keep track of visited URLs
+        # Keep track of visited URLs, canonicalized and stored as hashes or in a Bloom filter
+        self.visited = visited if visited is not None else make_url_store(visited_store, visited_capacity, visited_error_rate, visited_path)
         self.max_depth = max_depth
         self.user_agent = user_agent
-        self.robots_cache = {}  # Cache for robots parsers per domain
-        self.last_access_times = {}  # For rate limiting per domain
+        # Robots parsers per domain, shared by every crawler in this process unless one is passed in
+        self.robots_cache = robots_cache if robots_cache is not None else get_shared_robots_cache(user_agent, robots_db_path)
         self.default_delay = 1  # Default delay in seconds
+        # Per-host crawl delays, shared by every crawler in this process unless one is passed in
+        self.politeness = politeness if politeness is not None else get_shared_politeness(self.default_delay)
         self.crawled_data = []  # Store results for reporting
+        self.scorer = scorer  # Long-lived ScoringExecutor, shared per process if not given
+        self.scoring_workers = scoring_workers
+        self.scoring_backend = scoring_backend
+        # Shared with every other crawler in this process so it stays warm across pages and tasks
+        self.similarity_cache = configure_similarity_cache(similarity_cache_size, similarity_cache_path)
+        self.fetch_concurrency = fetch_concurrency  # Limits for the async fetch mode
+        self.per_host_concurrency = per_host_concurrency
+        self.fetch_timeout = fetch_timeout
+        self.fetch_batch_size = fetch_batch_size  # URLs fetched concurrently per scheduler round
+        self.priority_frontier = self.make_frontier()  # Global best-first queue for crawl_best_first
+        self.last_link_scores = {}  # Per-keyword scores of the last page's horizon, for per_keyword frontiers
+        # Size and type limits applied while streaming page bodies; fetch_head_kb keeps only the start
+        # of pages whose links are not followed
+        self.fetch_limits = FetchLimits(
+            max_bytes=fetch_max_kb * 1024 if fetch_max_kb else None,
+            allowed_types=allowed_content_types,
+            head_bytes=fetch_head_kb * 1024 if fetch_head_kb else None,
+        )
+        self.fetch_stats = FetchStats()
+        # Resumable state of crawl_best_first, saved every checkpoint_interval seconds when a path is set
+        self.checkpointer = Checkpointer(checkpoint_path, checkpoint_interval) if checkpoint_path else None
+        self._pending = []  # Popped from the frontier but not crawled yet
+        # Incremental re-crawl: revalidate pages seen in earlier runs and reuse their stored results
+        # Stored results are only reused by a crawl scoring the same keywords into the same horizon
+        scoring_key = json.dumps({"keywords": self.keywords, "max_horizon": max_horizon,
+                                  "frontier_mode": self.frontier_mode})
+        self.page_cache = PageCache(page_cache_path, scoring_key) if recrawl else None
+        # Cheap pre-scoring stage: only the lexically best link_top_k links of a page reach spaCy, and
+        # only their snippets are stored in CrawlResults.context_snippet (links_found still counts all)
+        self.link_filter = LinkFilter(
+            word,
+            top_k=link_top_k if link_top_k is not None else max(4 * max_horizon, 20),
+            scope=link_scope,
+            robots_cache=self.robots_cache,
+            user_agent=user_agent,
+        ) if prefilter_links else None
+        # Score tokens by lookup in a per-keyword table over the whole vector vocabulary; when off,
+        # no engine maps a table, not even one left on disk by an earlier crawl
+        self.precompute_relevance = precompute_relevance
+
+    def get_scorer(self):
+        """Get the executor used to score links, reusing the per-process one by default."""
+        if self.scorer is None:
+            self.scorer = get_scoring_executor(self.scoring_workers, self.scoring_backend,
+                                               self.similarity_cache.maxsize, self.similarity_cache.path)
+        return self.scorer
+
+    def prepare_relevance_table(self):
+        """Build or map the keyword's relevance table before any page is scored.
+
+        Done once here so the scoring workers, started later, only map the file.
+        """
+        if not self.precompute_relevance:
+            return
+        from src.models.similarity_engine import get_engine
+        for keyword in self.keywords:
+            with timed("relevance_table"):
+                table = get_engine(keyword).precompute_table()
+            logging.info(f"Relevance table for '{keyword}' ready with {len(table)} rows")
+
+    def make_frontier(self):
+        if self.frontier_mode == "per_keyword":
+            return MultiFrontier(self.keywords)
+        return Frontier()
 
     def get_robot_parser(self, base_url):
         """Get or fetch the Robots parser for a given base URL."""
-        if base_url in self.robots_cache:
-            return self.robots_cache[base_url]
-        else:
-            robots_url = f"{base_url}/robots.txt"
-            parser = RobotExclusionRulesParser()
-            try:
-                response = requests.get(robots_url, headers={"User-Agent": self.user_agent}, timeout=5)
-                if response.status_code == 200:
-                    parser.parse(response.text)
-                else:
-                    # Default to allowing all if robots.txt not found
-                    parser.parse('')
-                self.robots_cache[base_url] = parser
-                return parser
-            except requests.RequestException as e:
-                logging.error(f"Failed to fetch robots.txt from {robots_url}: {e}")
-                # Default to allowing all if there's a network error
-                parser.parse('')
-                self.robots_cache[base_url] = parser
-                return parser
+        with timed("robots"):
+            return self.robots_cache.get(base_url)
 
     def fetch_page(self, url):
         """Fetch the HTML content of a page."""
+        fetched = self.fetch_page_conditional(url)
+        return fetched.html if fetched is not None else None
+
+    def fetch_page_conditional(self, url, cached=None, truncate=False):
+        """Fetch a page as a FetchedPage, revalidating it against a CachedPage if given.
+
+        With ``truncate`` only the first fetch_head_kb of the body are read.
+        """
+        import requests
+
         try:
             # Parse the base URL
             parsed_url = urlparse(url)
@@ -138,99 +321,159 @@ class WebCrawler:
             # Check robots.txt compliance
             if not parser.is_allowed(self.user_agent, url):
                 logging.info(f"Disallowed by robots.txt: {url}")
+                get_metrics().inc("robots_disallowed")
                 return None
 
-            # Implement rate limiting based on Crawl-delay
-            now = time.time()
-            last_access = self.last_access_times.get(base_url, 0)
-            crawl_delay = parser.get_crawl_delay(self.user_agent)
-            if crawl_delay is not None:
-                delay = crawl_delay
-            else:
-                delay = self.default_delay  # Use default if Crawl-delay not specified
-
-            elapsed = now - last_access
-            logging.info(f"Elapsed time since last access to {base_url}: {elapsed:.2f} seconds; required delay: {delay} seconds")
-
-            if elapsed < delay:
-                sleep_time = delay - elapsed
-                logging.info(f"Rate limiting {base_url}: sleeping for {sleep_time} seconds")
-                time.sleep(sleep_time)
-
-            # Update last access time
-            self.last_access_times[base_url] = time.time()
-
-            # Fetch the page
-            response = requests.get(url, headers={"User-Agent": self.user_agent}, timeout=10)
-            if response.status_code == 200:
-                return response.text
-            else:
-                logging.warning(f"Non-200 status code {response.status_code} for URL: {url}")
+            # Wait out the host's crawl delay; the scheduler is shared with other crawler threads
+            self.politeness.update_from_robots(base_url, parser, self.user_agent)
+            waited = self.politeness.acquire(base_url)
+            get_metrics().observe("politeness_wait_seconds", waited)
+            if waited:
+                logging.info(f"Rate limited {base_url}: waited {waited:.2f} seconds")
+
+            # Fetch the page, streaming the body so oversized or non-HTML responses stop early
+            headers = {"User-Agent": self.user_agent, **conditional_headers(cached)}
+            with timed("fetch"), requests.get(url, headers=headers, timeout=self.fetch_timeout, stream=True) as response:
+                get_metrics().inc(f"http_{response.status_code}")
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                if response.status_code == 304 and cached is not None:
+                    return FetchedPage(304, None, etag, last_modified)
+                if response.status_code == 200:
+                    html = self.read_body(url, response, truncate)
+                    return FetchedPage(200, html, etag, last_modified) if html is not None else None
+                else:
+                    logging.warning(f"Non-200 status code {response.status_code} for URL: {url}")
         except requests.RequestException as e:
             logging.error(f"Failed to fetch {url}: {e}")
+            get_metrics().inc("fetch_errors")
         return None
 
+    def links_unneeded(self, depth):
+        """Whether a page's links will never be followed, so fetch_head_kb may cut its body."""
+        return depth + 1 > self.max_depth
+
+    def read_body(self, url, response, truncate=False):
+        """Read a streamed response within the fetch limits, or return None if it is skipped."""
+        limits = self.fetch_limits
+        declared_length = content_length(response.headers)
+        reason = limits.check_headers(response.headers)
+        if reason is not None:
+            self.fetch_stats.record_skip(reason, declared_length)
+            logging.info(f"Skipping {url} ({reason}): {response.headers.get('Content-Type')}, {declared_length} bytes")
+            return None
+
+        reader = BodyReader(limits, response.encoding, declared_length, truncate)
+        for chunk in response.iter_content(limits.chunk_size):
+            if not reader.feed(chunk):
+                break
+        html = reader.finish(self.fetch_stats)
+        if html is None:
+            logging.info(f"Skipping {url}: body exceeded {limits.max_bytes} bytes")
+        return html
+
+    def make_async_fetcher(self):
+        """Build an AsyncFetcher that shares this crawler's robots and politeness state."""
+        from src.crawler.async_fetcher import AsyncFetcher
+        return AsyncFetcher(
+            user_agent=self.user_agent,
+            max_concurrency=self.fetch_concurrency,
+            per_host_concurrency=self.per_host_concurrency,
+            timeout=self.fetch_timeout,
+            default_delay=self.default_delay,
+            robots_cache=self.robots_cache,
+            politeness=self.politeness,
+            limits=self.fetch_limits,
+            stats=self.fetch_stats,
+        )
+
+    def fetch_pages(self, urls):
+        """Fetch several pages concurrently, returning {url: html or None}."""
+        async def run():
+            async with self.make_async_fetcher() as fetcher:
+                return await fetcher.fetch_many(urls)
+        return asyncio.run(run())
+
+    def fetch_pages_conditional(self, urls, cached, truncate=()):
+        """Fetch several pages concurrently, returning {url: FetchedPage or None}."""
+        async def run():
+            async with self.make_async_fetcher() as fetcher:
+                return await fetcher.fetch_many_conditional(urls, cached, truncate)
+        return asyncio.run(run())
+
+    def cached_pages(self, entries):
+        """Stored results that (url, depth) entries may reuse if their pages are unchanged.
+
+        A page stored without scored links (it was at max_depth then) is only
+        reusable if its links are still not needed.
+        """
+        if self.page_cache is None:
+            return {}
+        depths = dict(entries)
+        cached = self.page_cache.get_many(depths)
+        return {url: page for url, page in cached.items()
+                if page.links is not None or depths[url] + 1 > self.max_depth}
+
     def validate_url(self, url):
         """Validate a URL to ensure it's complete and has a valid scheme."""
         parsed_url = urlparse(url)
         return parsed_url.scheme in ["http", "https"] and parsed_url.netloc
 
     def parse_links(self, html, base_url, context_range=100):
-        """Extract all links from a web page."""
-        soup = BeautifulSoup(html, 'html.parser')
-        links = []
+        """Extract all links from a web page (raw HTML or an already parsed PageRecord)."""
+        page = html if isinstance(html, PageRecord) else parse_page(html, base_url)
 
-        for link in soup.find_all('a', href=True):
+        resolved = []
+        for anchor in page.anchors:
             try:
                 # Resolve the full URL
-                url = urljoin(base_url, link['href'])
-
-                # Check if the URL starts with http/https and has not been visited
-                if not (url.startswith("http") or url.startswith("https")) or url in self.visited:
-                    continue
-
-                # Get the text content of the <a> tag
-                link_text = link.get_text(strip=True)
-
-                # Get the surrounding context, with error handling for missing elements
-                try:
-                    preceding_text = link.find_previous(string=True)
-                except AttributeError:
-                    preceding_text = ""
-                try:
-                    following_text = link.find_next(string=True).find_next(string=True)
-                except AttributeError:
-                    following_text = ""
-
-                # Merge the context and split into words
-                context = (
-                    (preceding_text or "").strip() + " " + link_text + " " + (following_text or "").strip()
-                )
-                context_words = context.split()
-
-                # Limit to the specified number of context words
-                start = max(0, len(context_words) // 2 - context_range)
-                end = min(len(context_words), len(context_words) // 2 + context_range)
-                context_snippet = " ".join(context_words[start:end])
-
-                # Add the link and context snippet if valid
-                if len(context_snippet.split()) > 3:
-                    links.append((url, context_snippet))
-
+                url = urljoin(base_url, anchor.href)
             except ValueError:
                 # Handle malformed URLs gracefully
-                logging.warning(f"Skipping malformed URL: {link['href']}")
+                logging.warning(f"Skipping malformed URL: {anchor.href}")
+                continue
+            # Check if the URL starts with http/https
+            if url.startswith("http") or url.startswith("https"):
+                resolved.append((url, anchor))
+
+        # One lookup for the whole page, so a SQLite seen store costs one query rather than one per link
+        visited = seen_urls(self.visited, [url for url, _ in resolved])
+        links = []
+        for url, anchor in resolved:
+            if url in visited:
                 continue
 
+            # Merge the link text with the text just before and after it and split into words
+            context = (
+                anchor.preceding_text.strip() + " " + anchor.text + " " + anchor.following_text.strip()
+            )
+            context_words = context.split()
+
+            # Limit to the specified number of context words
+            start = max(0, len(context_words) // 2 - context_range)
+            end = min(len(context_words), len(context_words) // 2 + context_range)
+            context_snippet = " ".join(context_words[start:end])
+
+            # Add the link and context snippet if valid
+            if len(context_snippet.split()) > 3:
+                links.append((url, context_snippet))
+
         return links
 
 
     def calculate_relevance(self, content, keyword):
-        """Calculate relevance of page content to a keyword."""
-        soup = BeautifulSoup(content, 'html.parser')
-        human_readable_text = soup.get_text()
-
-        scores = clean_html(human_readable_text.split(), keyword)
+        """Calculate relevance of page content (raw HTML or a PageRecord) to a keyword.
+
+        Given a list of keywords, returns one average per keyword, all scored in one pass.
+        """
+        page = content if isinstance(content, PageRecord) else parse_page(content)
+
+        from src.models.similarities import clean_html
+        scores = clean_html(page.words, keyword, use_table=self.precompute_relevance)
+        # A page with no scorable words (empty, or only scripts and styles) is simply irrelevant
+        if not isinstance(keyword, str):
+            return [sum(values) / len(values) if values else 0.0 for values in scores]
+        if not scores:
+            return 0.0
         average = sum(scores) / len(scores)
         return average
 
@@ -242,7 +485,6 @@ class WebCrawler:
 
     def crawl(self, url, depth=0, log_file="myfile.txt"):
         """Recursively crawl a URL to the specified depth."""
-        global WORKER_START_TIME
         start_time = time.time() 
 
         if depth > self.max_depth or url in self.visited:
@@ -256,100 +498,466 @@ class WebCrawler:
         self.visited.add(url)
         logging.info(f"Crawling: {url} (Depth: {depth})")
 
-        html = self.fetch_page(url)
-        if not html:
+        cached = self.cached_pages([(url, depth)]).get(url)
+        fetched = self.fetch_page_conditional(url, cached, self.links_unneeded(depth))
+        if self.fetch_failed(fetched):
             logging.warning(f"Skipping invalid URL during crawl: {url} - could not get HTML")
             return
+
+        horizon = self.handle_fetched(url, depth, fetched, cached, start_time, log_file)
+        if horizon is None:
+            return
+
+        # Recursively crawl the top URLs
+        while len(horizon) > 0:
+            logging.info(f"{url} current Horizon Size: {len(horizon)}")
+            score, next_url = horizon.pop_highest()
+            logging.info(f"{score} Next target: {next_url}")
+            self.crawl(next_url, depth + 1, log_file)
         
-        relevance_score = self.calculate_relevance(html, self.target_word)
-        links = self.parse_links(html, url, 20)
-        cleaned_links = clean_words(links)
+        return
+
+    @staticmethod
+    def fetch_failed(fetched):
+        """True when there is nothing to process: no response, or an empty 200 body."""
+        return fetched is None or (fetched.status == 200 and not fetched.html)
+
+    @staticmethod
+    def page_start_time(fetched):
+        """When a page's own work started: now, minus its fetch time if the fetcher recorded it.
+
+        Pages of a batch are fetched together but processed one after the
+        other, so the batch's start time would charge each page for the ones
+        processed before it.
+        """
+        return time.time() - (fetched.fetch_sec or 0.0)
+
+    def handle_fetched(self, url, depth, fetched, cached, start_time, log_file="myfile.txt"):
+        """Process a FetchedPage, reusing the stored result when the page has not changed."""
+        metrics = get_metrics()
+        with metrics.timer("page"):
+            if self.page_cache is not None and self.page_cache.is_unchanged(url, fetched, cached):
+                metrics.inc("pages_reused")
+                return self.reuse_page(url, depth, fetched, cached, start_time, log_file)
+            metrics.inc("pages_processed")
+            return self.process_page(url, depth, fetched.html, start_time, log_file, fetched)
+
+    def reuse_page(self, url, depth, fetched, cached, start_time, log_file="myfile.txt"):
+        """Store a page's previous score and rebuild its horizon without parsing or scoring it."""
+        self.page_cache.refresh(url, fetched)
+        self.last_link_scores = {}  # Only the combined link scores are cached
+        duration_sec = time.time() - start_time
+        total_duration_sec = time.time() - WORKER_START_TIME if WORKER_START_TIME else duration_sec
+        insert_crawl_result(url, depth, cached.links_found, cached.relevance_score, cached.context_snippet,
+                            duration_sec, total_duration_sec)
+        if self.multi_keyword and cached.keyword_scores is not None:
+            insert_keyword_scores(url, depth, self.keywords, cached.keyword_scores)
+        self.log_progress(url, depth, log_file)
+
+        if depth + 1 > self.max_depth:
+            return None
+        # Same size as the horizon the links were stored from: per_keyword keeps max_horizon per keyword
+        horizon = TopValues(self.max_horizon * len(self.keywords) if self.frontier_mode == "per_keyword"
+                            else self.max_horizon)
+        for score, next_url in cached.links:
+            if next_url not in self.visited:
+                horizon.add((next_url, score))
+        return horizon
+
+    def process_page(self, url, depth, html, start_time, log_file="myfile.txt", fetched=None):
+        """Score and store a fetched page, returning a TopValues horizon of its best links.
+
+        Returns None when the page's children would be beyond max_depth. With a
+        page cache, ``fetched`` (the FetchedPage) is stored for the next re-crawl.
+        """
+        # Parse once and share the result between scoring and link discovery
+        with timed("parse"):
+            page = parse_page(html, url)
+        with timed("relevance"):  # Cleaning and scoring the page's own text
+            relevance_score = self.calculate_relevance(page, self.target_word)
+        keyword_scores = None
+        if self.multi_keyword:
+            keyword_scores, relevance_score = relevance_score, max(relevance_score)
+        links = self.parse_links(page, url, 20)
+        links_found = len(links)
+        if self.link_filter is not None:
+            with timed("prefilter"):
+                links = self.link_filter.filter(links, url, seen=(self.visited, self.priority_frontier))
+        from src.models.similarities import clean_words
+        with timed("clean"):
+            cleaned_links = clean_words(links)
 
         # Save the crawl results
         duration_sec = time.time() - start_time
         total_duration_sec = time.time() - WORKER_START_TIME if WORKER_START_TIME else duration_sec
-        insert_crawl_result(url, depth, len(cleaned_links), round(relevance_score,4), "; ".join(snippet for _, snippet in cleaned_links), duration_sec, total_duration_sec)
+        # With the prefilter on, this holds the snippets of the links kept for scoring only, not every link found
+        context_snippet = "; ".join(snippet for _, snippet in cleaned_links)
+        insert_crawl_result(url, depth, links_found, round(relevance_score,4), context_snippet, duration_sec, total_duration_sec)
+        if keyword_scores is not None:
+            insert_keyword_scores(url, depth, self.keywords, keyword_scores)
         
         #self.crawled_data.append(entry)
         self.log_progress(url, depth, log_file)
 
         if depth + 1 > self.max_depth:  # Avoid making calculations for depths were never going to visit
             logging.warning(f"Skipping finding children of {url}")
-            return
+            self.remember_page(url, fetched, relevance_score, links_found, context_snippet,
+                               keyword_scores=keyword_scores)
+            return None
         
-        # Use ThreadPoolExecutor for limited workers
-        MAX_WORKERS = 10  # Limit the number of processes
-        tasks = [(item, self.target_word) for item in cleaned_links]
+        # Score the links on the long-lived executor instead of a fresh Pool per page
+        with timed("similarity"):
+            results = self.get_scorer().score(cleaned_links, self.target_word,
+                                              use_table=self.precompute_relevance)
+
+            if self.multi_keyword:
+                horizon = self.keyword_horizon(results)
+            else:
+                # Use a TopValues object to prioritize the best results
+                horizon = TopValues(self.max_horizon)
+                for a_url, values in results:
+                    try:
+                        url_average = sum(values) / len(values)
+                    except ZeroDivisionError:
+                        url_average = float("-inf")
+                    horizon.add((a_url, url_average))
+        get_metrics().inc("links_scored", len(cleaned_links))
+        self.remember_page(url, fetched, relevance_score, links_found, context_snippet, horizon.get_top_values(),
+                           keyword_scores)
+        return horizon
+
+    def keyword_horizon(self, results):
+        """TopValues horizon of a multi-keyword crawl, from (url, per-token x per-keyword scores).
+
+        Links are ranked by their best keyword average. With per_keyword
+        frontiers each keyword keeps its own best max_horizon links, and their
+        per-keyword scores are left in ``last_link_scores`` for queueing.
+        """
+        averages = {}
+        for a_url, values in results:
+            if len(values):
+                averages[a_url] = [float(value) for value in values.mean(axis=0)]
+            else:
+                averages[a_url] = [float("-inf")] * len(self.keywords)
+
+        self.last_link_scores = {}
+        if self.frontier_mode == "combined":
+            horizon = TopValues(self.max_horizon)
+            for a_url, scores in averages.items():
+                horizon.add((a_url, max(scores)))
+            return horizon
+
+        horizon = TopValues(self.max_horizon * len(self.keywords))
+        for i in range(len(self.keywords)):
+            best = TopValues(self.max_horizon)
+            for a_url, scores in averages.items():
+                best.add((a_url, scores[i]))
+            for score, a_url in best.get_top_values():
+                self.last_link_scores.setdefault(a_url, [None] * len(self.keywords))[i] = score
+        for a_url, scores in self.last_link_scores.items():
+            horizon.add((a_url, max(score for score in scores if score is not None)))
+        return horizon
+
+    def remember_page(self, url, fetched, relevance_score, links_found, context_snippet, links=None,
+                      keyword_scores=None):
+        """Keep a processed page's result in the page cache for the next re-crawl."""
+        if self.page_cache is None or fetched is None:
+            return
+        if keyword_scores is not None:
+            keyword_scores = [round(score, 4) for score in keyword_scores]
+        self.page_cache.put(url, fetched, round(relevance_score, 4), links_found, context_snippet, links,
+                            keyword_scores)
+
+    def crawl_best_first(self, log_file="myfile.txt", resume=False):
+        """Crawl iteratively from one global frontier, best-scoring ready URL first.
+
+        Each page still contributes at most max_horizon children and nothing
+        beyond max_depth is queued, but a high-value link found anywhere is
+        crawled before low-value links elsewhere. Ready URLs are fetched
+        concurrently, at most one per host per batch. With ``resume`` the crawl
+        continues from the latest checkpoint instead of the seeds.
+        """
+        if not (resume and self.restore_checkpoint()):
+            if self.checkpointer is not None:
+                self.checkpointer.reset()
+            for url in self.frontier:
+                self.priority_frontier.push(url, float("inf"), 0)
+        frontier = self.priority_frontier
+
+        # One event loop and fetcher for the whole crawl so keep-alive connections are reused
+        loop = asyncio.new_event_loop()
+        fetcher = loop.run_until_complete(self.make_async_fetcher().__aenter__())
+        try:
+            self._crawl_frontier(frontier, loop, fetcher, log_file)
+        finally:
+            # Also on Ctrl+C, so an interrupted crawl resumes from where it stopped
+            self.save_checkpoint()
+            loop.run_until_complete(fetcher.__aexit__(None, None, None))
+            loop.close()
+
+    def save_checkpoint(self):
+        """Checkpoint the frontier, politeness state and visited URLs, if checkpointing is on."""
+        if self.checkpointer is None:
+            return
+        # Commit the rows of every page about to be recorded as visited, so a resume never skips an unstored page
+        get_result_sink("results.sqlite3").flush()
+        state = self.priority_frontier.snapshot(self._pending)
+        state["politeness"] = self.politeness.snapshot()
+        state["visited"] = self.visited.snapshot()
+        self.checkpointer.save(state)
+
+    def restore_checkpoint(self):
+        """Load the latest checkpoint; returns False if there is none to resume from."""
+        state = self.checkpointer.load() if self.checkpointer is not None else None
+        if state is None:
+            logging.info("No checkpoint to resume from, starting from the seeds")
+            return False
+        if "frontiers" in state:
+            self.priority_frontier = MultiFrontier.restore(state)
+        else:
+            self.priority_frontier = Frontier.restore(state)
+        if not self.visited.restore(state["visited"]):
+            logging.warning("Checkpoint was saved with another visited store; "
+                            "already crawled pages may be fetched again")
+        self.politeness.restore(state["politeness"])
+        logging.info(f"Resumed with {len(self.priority_frontier)} queued and {len(self.visited)} visited URLs")
+        return True
+
+    def _crawl_frontier(self, frontier, loop, fetcher, log_file):
+        """Drain the frontier in batches of ready URLs until it is empty."""
+        while len(frontier):
+            if self.checkpointer is not None and self.checkpointer.due():
+                self.save_checkpoint()
+
+            batch, wait = frontier.pop_ready(self.politeness.ready_at, self.fetch_batch_size)
+            if not batch:
+                # Nothing is eligible on any host; sleep only until the next host is
+                time.sleep(wait)
+                continue
 
-        # Define the Pool with MAX_WORKERS
-        with Pool(processes=MAX_WORKERS) as pool:
-            results = pool.starmap(calculate_similarities, tasks)
+            batch = [entry for entry in batch if self.validate_url(entry.url) and entry.url not in self.visited]
+            self._pending = list(batch)
+            for entry in batch:
+                logging.info(f"Crawling: {entry.url} (Depth: {entry.depth}, Score: {entry.score})")
+
+            cached = self.cached_pages([(entry.url, entry.depth) for entry in batch])
+            truncate = {entry.url for entry in batch if self.links_unneeded(entry.depth)}
+            pages = loop.run_until_complete(
+                fetcher.fetch_many_conditional([entry.url for entry in batch], cached, truncate))
+
+            for entry in batch:
+                fetched = pages.get(entry.url)
+                if self.fetch_failed(fetched):
+                    logging.warning(f"Skipping invalid URL during crawl: {entry.url} - could not get HTML")
+                    self.mark_visited(entry)
+                    continue
 
+                horizon = self.handle_fetched(entry.url, entry.depth, fetched, cached.get(entry.url),
+                                              self.page_start_time(fetched), log_file)
+                # Marked visited only once its row is queued, and save_checkpoint flushes the queue first,
+                # so a checkpoint never skips a page it did not store
+                self.mark_visited(entry)
+                if horizon is None:
+                    continue
+                for score, next_url in horizon.get_top_values():
+                    if next_url not in self.visited:
+                        if next_url in self.last_link_scores:
+                            frontier.push(next_url, score, entry.depth + 1, entry.url,
+                                          scores=self.last_link_scores[next_url])
+                        else:
+                            frontier.push(next_url, score, entry.depth + 1, entry.url)
+                logging.info(f"Frontier size after {entry.url}: {len(frontier)}")
+
+    def mark_visited(self, entry):
+        """Record a popped frontier entry as crawled."""
+        self.visited.add(entry.url)
+        self._pending.remove(entry)
+
+    def crawl_entries(self, entries, log_file="myfile.txt"):
+        """Fetch and process one batch of [url, depth, score] entries.
+
+        Returns the (url, depth, score) children worth crawling next. Used by the
+        distributed mode, where the frontier lives in the broker rather than here.
+        """
+        entries = [entry for entry in entries if entry[1] <= self.max_depth and self.validate_url(entry[0])]
+        self.prepare_relevance_table()
+        cached = self.cached_pages([(url, depth) for url, depth, _ in entries])
+        truncate = {url for url, depth, _ in entries if self.links_unneeded(depth)}
+        pages = self.fetch_pages_conditional([url for url, _, _ in entries], cached, truncate)
+
+        children = []
+        for url, depth, _ in entries:
+            fetched = pages.get(url)
+            if self.fetch_failed(fetched):
+                logging.warning(f"Skipping invalid URL during crawl: {url} - could not get HTML")
+                continue
+            horizon = self.handle_fetched(url, depth, fetched, cached.get(url), self.page_start_time(fetched),
+                                          log_file)
+            if horizon is not None:
+                children.extend((next_url, depth + 1, score) for score, next_url in horizon.get_top_values())
+        return children
+
+    def start(self, log_file="myfile.txt", strategy="best_first", resume=False):
+        """Start the crawling process, or resume it from its checkpoint (best_first only)."""
+        with open(log_file, "a" if resume else "w", encoding="utf-8") as file:
+            file.write("Resuming Web Crawler...\n" if resume else "Starting Web Crawler...\n")
+        self.prepare_relevance_table()
+        if strategy == "best_first":
+            self.crawl_best_first(log_file=log_file, resume=resume)
+        elif strategy == "recursive":
+            for url in self.frontier:
+                self.crawl(url, log_file=log_file)
+        else:
+            raise ValueError(f"Unknown crawl strategy '{strategy}', expected 'best_first' or 'recursive'")
 
-        # Use a TopValues object to prioritize the best results
-        horizon = TopValues(self.max_horizon)
-        for a_url, values in results:
-            try:
-                url_average = sum(values) / len(values)
-            except ZeroDivisionError:
-                url_average = float("-inf")
-            horizon.add((a_url, url_average))
+        logging.info(f"Similarity cache: {self.similarity_cache.stats()}")
+        self.similarity_cache.save()
 
-        # Recursively crawl the top URLs
-        while len(horizon.get_top_values()) > 0:
-            logging.info(f"{url} current Horizon Size: {len(horizon.get_top_values())}")
-            score, next_url = horizon.pop_highest()
-            logging.info(f"{score} Next target: {next_url}")
-            self.crawl(next_url, depth + 1, log_file)
-        
-        return
+        logging.info(f"Fetch limits: {self.fetch_stats.stats()}")
+        logging.info(f"Robots cache: {self.robots_cache.stats()}")
+        if self.page_cache is not None:
+            logging.info(f"Page cache: {self.page_cache.stats()}")
+        if self.link_filter is not None:
+            logging.info(f"Link filter: {self.link_filter.stats()}")
+        logging.info(f"Visited {len(self.visited)} URLs, store uses {self.visited.memory_bytes()} bytes")
+        self.visited.save()
 
-    def start(self, log_file="myfile.txt"):
-        """Start the crawling process."""
-        with open(log_file, "w", encoding="utf-8") as file:
-            file.write("Starting Web Crawler...\n")
-        for url in self.frontier:
-            self.crawl(url, log_file=log_file)
+        sink = get_result_sink("results.sqlite3")
+        sink.flush()
+        logging.info(f"Result sink: {sink.stats()}")
+        if self.page_cache is not None:
+            self.page_cache.flush()
+        logging.info(f"Metrics: {json.dumps(get_metrics().snapshot())}")
 
 
 @app.task(name="crawler.crawl_url")
-def celery_crawl_url(seed_url, target_word, max_depth=2, max_horizon=100, log_file="myfile.txt"):
-    """Wrap the WebCrawler logic for distributed tasks."""
-    crawler = WebCrawler([seed_url], target_word, max_depth, max_horizon)
-    crawler.start(log_file=log_file)
+def celery_crawl_url(seed_url, target_word, max_depth=2, max_horizon=100, log_file="myfile.txt", strategy="best_first",
+                     checkpoint_path=None, checkpoint_interval=60, resume=False, recrawl=False,
+                     frontier_mode="combined", robots_db_path=None):
+    """Wrap the WebCrawler logic for distributed tasks; ``target_word`` may be a list of keywords."""
+    crawler = WebCrawler([seed_url], target_word, max_depth, max_horizon,
+                         checkpoint_path=checkpoint_path, checkpoint_interval=checkpoint_interval, recrawl=recrawl,
+                         frontier_mode=frontier_mode, robots_db_path=robots_db_path)
+    crawler.start(log_file=log_file, strategy=strategy, resume=resume)
     return crawler.crawled_data
 
 
-@app.task(name="crawler.generate_report")
-def generate_csv_report(filename="crawled_report.csv"):
-    """Generate a CSV report from the SQLite database."""
-    conn = sqlite3.connect("results.sqlite3")
-    cursor = conn.cursor()
-    cursor.execute('''SELECT url, depth, links_found, relevance_score, context_snippet FROM CrawlResults''')
-    rows = cursor.fetchall()
-    conn.close()
-
-    with open(filename, mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(["URL", "Depth", "Links Found", "Relevance Score", "Context Snippet"])
-        writer.writerows(rows)
+def frontier_queue(partition):
+    """Broker queue holding the frontier URLs of one host partition."""
+    return f"frontier.{partition}"
+
+
+def enqueue_frontier(entries, target_word, max_depth=2, max_horizon=100, partitions=1, batch_size=10,
+                     seen_db_path="seen.sqlite3", log_file="myfile.txt", recrawl=False, robots_db_path=None):
+    """Send unseen (url, depth, score) entries to their host partition's queue in batches.
+
+    Deduplication goes through the SQLite seen store shared by every worker on
+    the node, so a URL is enqueued once no matter how many pages link to it.
+    """
+    seen = SQLiteSeenStore(seen_db_path)
+    by_url = {url: (url, depth, score) for url, depth, score in entries if depth <= max_depth}
+    new_urls = seen.add_many(list(by_url))
+
+    by_partition = {}
+    for url in new_urls:
+        by_partition.setdefault(host_partition(url, partitions), []).append(by_url[url])
+
+    for partition, batch in by_partition.items():
+        for i in range(0, len(batch), batch_size):
+            celery_crawl_batch.apply_async(
+                args=(batch[i:i + batch_size], target_word),
+                kwargs=dict(max_depth=max_depth, max_horizon=max_horizon, partitions=partitions,
+                            batch_size=batch_size, seen_db_path=seen_db_path, log_file=log_file,
+                            recrawl=recrawl, robots_db_path=robots_db_path),
+                queue=frontier_queue(partition),
+            )
+    return len(new_urls)
+
+
+@app.task(name="crawler.crawl_batch", ignore_result=True)
+def celery_crawl_batch(entries, target_word, max_depth=2, max_horizon=100, partitions=1, batch_size=10,
+                       seen_db_path="seen.sqlite3", log_file="myfile.txt", recrawl=False, robots_db_path=None):
+    """Crawl one batch of frontier URLs and enqueue the links they lead to.
+
+    Unlike celery_crawl_url, a task only ever handles a few URLs, so a single
+    seed fans out over every worker consuming the frontier queues.
+    """
+    seen = SQLiteSeenStore(seen_db_path)
+    crawler = WebCrawler([], target_word, max_depth, max_horizon, visited=seen, recrawl=recrawl,
+                         robots_db_path=robots_db_path)
+    children = crawler.crawl_entries(entries, log_file)
+    enqueued = enqueue_frontier(children, target_word, max_depth, max_horizon, partitions, batch_size,
+                                seen_db_path, log_file, recrawl, robots_db_path)
+    logging.info(f"Crawled batch of {len(entries)} URLs, enqueued {enqueued} new ones")
+    return len(entries)
+
+
+def start_distributed_crawl(seed_urls, target_word, max_depth=2, max_horizon=100, partitions=1, batch_size=10,
+                            seen_db_path="seen.sqlite3", log_file="myfile.txt", recrawl=False, robots_db_path=None):
+    """Seed the distributed frontier; workers take it from there.
+
+    Also runs synchronously with app.conf.task_always_eager set, e.g. together
+    with the in-memory broker ("memory://") for local runs and tests.
+    """
+    seeds = [(url, 0, None) for url in seed_urls]
+    return enqueue_frontier(seeds, target_word, max_depth, max_horizon, partitions, batch_size,
+                            seen_db_path, log_file, recrawl, robots_db_path)
 
-    logging.info(f"Report saved to {filename}")
 
-def start_celery_worker(seed_url, concurrency=5):
-    """Start a Celery worker for a specific seed URL."""
+@app.task(name="crawler.generate_report")
+def generate_csv_report(filename="crawled_report.csv"):
+    """Generate a CSV report from the SQLite database, streaming rows in chunks."""
+    export_report(filename, "results.sqlite3", fmt="csv",
+                  headers=["URL", "Depth", "Links Found", "Relevance Score", "Context Snippet"])
+
+def checkpoint_path_for(seed_url):
+    """Checkpoint file of the crawl started from a seed URL."""
+    return f"checkpoint_{seed_url.replace('://', '_').replace('/', '_')}.sqlite3"
+
+def start_celery_worker(seed_url, concurrency=5, queues=None, metrics_file=None, metrics_format="json",
+                        profile_dir=None, pool="threads"):
+    """Start a Celery worker for a specific seed URL, optionally consuming only the given queues.
+
+    ``metrics_file`` (may contain ``{pid}``) makes the worker export metrics
+    snapshots there; ``profile_dir`` makes it cProfile every task it runs.
+    With ``pool="prefork"`` the model is loaded once and shared copy-on-write
+    by ``concurrency`` forked child processes.
+    """
     logging.info(f"Starting Celery worker for: {seed_url}")
     command = [
         sys.executable,
         "-m", "celery",
         "-A", "src.crawler.crawler",
         "worker",
-        "--pool=threads",
+        f"--pool={pool}",
         f"--concurrency={concurrency}",
         "--loglevel=info",
         "--hostname", f"worker_{seed_url.replace('://', '_').replace('/', '_')}"
     ]
-    return Popen(command, stdout=sys.stdout, stderr=sys.stderr)
+    if queues:
+        command += ["-Q", ",".join(queues)]
+    env = dict(os.environ, CRAWLER_POOL=pool)
+    if pool == "prefork":
+        env.setdefault("CRAWLER_SCORING_BACKEND", "thread")
+    if metrics_file:
+        env.update(CRAWLER_METRICS_FILE=metrics_file, CRAWLER_METRICS_FORMAT=metrics_format)
+    if profile_dir:
+        env["CRAWLER_PROFILE_DIR"] = profile_dir
+    return Popen(command, stdout=sys.stdout, stderr=sys.stderr, env=env)
+
+def start_partition_workers(num_workers, partitions, concurrency=5, **worker_options):
+    """Start workers that split the frontier partitions between them.
+
+    Each partition is consumed by exactly one worker, so all URLs of a host are
+    crawled from one process and its politeness state stays consistent.
+    ``worker_options`` are passed on to start_celery_worker.
+    """
+    workers = []
+    for i in range(num_workers):
+        queues = [frontier_queue(p) for p in range(partitions) if p % num_workers == i]
+        if queues:
+            workers.append(start_celery_worker(f"partition_{i}", concurrency, queues, **worker_options))
+    return workers
 
 def terminate_all_tasks():
     """Terminate all running Celery tasks."""
@@ -376,27 +984,72 @@ def stop_all_workers(workers):
     logging.info("All workers have been stopped.")
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run the distributed web crawler.")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="continue from the latest checkpoints and keep existing results")
+    arg_parser.add_argument("--checkpoint-interval", type=float, default=60,
+                            help="seconds between checkpoints of each crawl (default: 60)")
+    arg_parser.add_argument("--recrawl", action="store_true",
+                            help="revalidate pages crawled in earlier runs and reuse unchanged results")
+    arg_parser.add_argument("--metrics-file", default=None,
+                            help="have each worker export metrics here ({pid} is replaced by its process id)")
+    arg_parser.add_argument("--metrics-format", choices=("json", "prometheus"), default="json")
+    arg_parser.add_argument("--profile-dir", default=None, help="cProfile every task into this directory")
+    arg_parser.add_argument("--pool", choices=("threads", "prefork"), default="threads",
+                            help="Celery pool; prefork shares one preloaded model copy-on-write")
+    arg_parser.add_argument("--distributed", action="store_true",
+                            help="spread URLs over frontier.N queues instead of one task per seed")
+    arg_parser.add_argument("--partitions", type=int, default=4, help="with --distributed: frontier queues")
+    arg_parser.add_argument("--workers", type=int, default=2,
+                            help="with --distributed: worker processes sharing the partitions")
+    arg_parser.add_argument("--robots-db", default="robots.sqlite3",
+                            help="SQLite file sharing fetched robots.txt files between worker processes")
+    arg_parser.add_argument("--keywords", nargs="+", default=None,
+                            help="score several keywords in one crawl instead of 'crawler'")
+    arg_parser.add_argument("--frontier-mode", choices=("combined", "per_keyword"), default="combined",
+                            help="with --keywords: one frontier by best keyword score, or one per keyword")
+    args = arg_parser.parse_args()
+
     seed_urls = ["https://en.wikipedia.org/wiki/Special:Random"]
-    target_word = "crawler"
+    target_word = args.keywords if args.keywords else "crawler"
     max_depth = 2
     max_horizon = 4
     log_file = "myfile.txt"
 
-    # Purge Celery queue and backend before starting
-    purge_backend_and_queue()
+    # Purge Celery queue and backend before starting, unless picking up an interrupted crawl
+    if not args.resume:
+        # Partition queues too, in case an earlier --distributed run left batches behind
+        purge_backend_and_queue(args.partitions)
 
     initialize_database()
 
     workers = []
     try:
+        if args.distributed:
+            workers = start_partition_workers(args.workers, args.partitions, metrics_file=args.metrics_file,
+                                              metrics_format=args.metrics_format, profile_dir=args.profile_dir,
+                                              pool=args.pool)
+            time.sleep(5)  # Allow workers to start up
+            start_distributed_crawl(seed_urls, target_word, max_depth, max_horizon, args.partitions, log_file=log_file,
+                                    recrawl=args.recrawl, robots_db_path=args.robots_db)
+            logging.info("Seeds enqueued; press Ctrl+C once the frontier queues are drained.")
+            while True:
+                time.sleep(1)
+
         for seed_url in seed_urls:
-            worker_process = start_celery_worker(seed_url)
+            worker_process = start_celery_worker(seed_url, metrics_file=args.metrics_file,
+                                                 metrics_format=args.metrics_format, profile_dir=args.profile_dir,
+                                                 pool=args.pool)
             workers.append(worker_process)
 
         time.sleep(5)  # Allow workers to start up
 
         crawl_tasks = group(
-            celery_crawl_url.s(seed_url, target_word, max_depth=max_depth, max_horizon=max_horizon, log_file=log_file)
+            celery_crawl_url.s(seed_url, target_word, max_depth=max_depth, max_horizon=max_horizon, log_file=log_file,
+                               checkpoint_path=checkpoint_path_for(seed_url),
+                               checkpoint_interval=args.checkpoint_interval, resume=args.resume,
+                               recrawl=args.recrawl, frontier_mode=args.frontier_mode,
+                               robots_db_path=args.robots_db)
             for seed_url in seed_urls
         )
         logging.info("Tasks for crawling have been enqueued.")
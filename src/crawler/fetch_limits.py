@@ -0,0 +1,129 @@
+import codecs
+import threading
+
+DEFAULT_ALLOWED_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class FetchLimits:
+    """What a fetch is allowed to download.
+
+    ``max_bytes`` caps the body of a page; bodies announced or found to be larger
+    are dropped. ``head_bytes`` keeps only the first N bytes of a page and stops
+    reading there. It only applies to fetches that ask for it: pages whose links
+    will be extracted are always read in full, so no link is lost to the cut.
+    """
+
+    def __init__(self, max_bytes=2 * 1024 * 1024, allowed_types=DEFAULT_ALLOWED_TYPES, head_bytes=None,
+                 chunk_size=16 * 1024):
+        self.max_bytes = max_bytes
+        self.allowed_types = tuple(allowed_types) if allowed_types else ()
+        self.head_bytes = head_bytes
+        self.chunk_size = chunk_size
+
+    def check_headers(self, headers):
+        """Return the reason to skip a response from its headers alone, or None."""
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if self.allowed_types and content_type and content_type not in self.allowed_types:
+            return "content_type"
+        length = content_length(headers)
+        if self.max_bytes is not None and length is not None and length > self.max_bytes:
+            return "too_large"
+        return None
+
+
+class FetchStats:
+    """Counts what the fetch limits skipped and how many bytes that saved.
+
+    Savings are only known when the server sent Content-Length; responses
+    without one are still counted, just not in the byte totals.
+    """
+
+    REASONS = ("content_type", "too_large", "truncated")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.bytes_read = 0
+        self.skipped = {reason: 0 for reason in self.REASONS}
+        self.bytes_saved = {reason: 0 for reason in self.REASONS}
+
+    def record_page(self, bytes_read):
+        with self._lock:
+            self.pages += 1
+            self.bytes_read += bytes_read
+
+    def record_skip(self, reason, declared_length=None, bytes_read=0, page_kept=False):
+        with self._lock:
+            self.skipped[reason] += 1
+            self.pages += 1 if page_kept else 0
+            self.bytes_read += bytes_read
+            if declared_length is not None:
+                self.bytes_saved[reason] += max(0, declared_length - bytes_read)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pages": self.pages,
+                "bytes_read": self.bytes_read,
+                "skipped": dict(self.skipped),
+                "bytes_saved": dict(self.bytes_saved),
+                "total_bytes_saved": sum(self.bytes_saved.values()),
+            }
+
+
+class BodyReader:
+    """Decode a response body chunk by chunk while enforcing FetchLimits.
+
+    Feed raw chunks until ``feed`` returns False, then call ``finish``. The
+    result is the decoded text, or None if the body went over ``max_bytes``.
+    With ``truncate`` the body is cut at the limits' ``head_bytes``.
+    """
+
+    def __init__(self, limits, encoding=None, declared_length=None, truncate=False):
+        self.limits = limits
+        self.head_bytes = limits.head_bytes if truncate else None
+        self.declared_length = declared_length
+        try:
+            decoder_class = codecs.getincrementaldecoder(encoding or "utf-8")
+        except LookupError:
+            # Unknown charset announced by the server
+            decoder_class = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder_class(errors="replace")
+        self._parts = []
+        self.bytes_read = 0
+        self.outcome = None  # None, "too_large" or "truncated"
+
+    def feed(self, chunk):
+        """Consume a chunk; returns False once no more of the body is wanted."""
+        limits = self.limits
+        if self.head_bytes is not None and self.bytes_read + len(chunk) > self.head_bytes:
+            chunk = chunk[:self.head_bytes - self.bytes_read]
+            self.outcome = "truncated"
+        self.bytes_read += len(chunk)
+        if limits.max_bytes is not None and self.bytes_read > limits.max_bytes:
+            self.outcome = "too_large"
+            self._parts = []
+            return False
+        self._parts.append(self._decoder.decode(chunk))
+        return self.outcome is None
+
+    def finish(self, stats=None):
+        """Return the decoded text (None if too large) and record the outcome."""
+        if self.outcome == "too_large":
+            if stats is not None:
+                stats.record_skip("too_large", self.declared_length, self.bytes_read)
+            return None
+        self._parts.append(self._decoder.decode(b"", final=True))
+        if stats is not None:
+            if self.outcome == "truncated":
+                stats.record_skip("truncated", self.declared_length, self.bytes_read, page_kept=True)
+            else:
+                stats.record_page(self.bytes_read)
+        return "".join(self._parts)
+
+
+def content_length(headers):
+    try:
+        return int(headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
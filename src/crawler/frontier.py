@@ -0,0 +1,255 @@
+import heapq
+import itertools
+import time
+from urllib.parse import urlparse
+
+from src.crawler.url_store import HashedURLSet
+
+
+class FrontierEntry:
+    """A URL waiting to be crawled, with the score and depth it was found at."""
+
+    __slots__ = ("score", "depth", "url", "parent")
+
+    def __init__(self, score, depth, url, parent=None):
+        self.score = score
+        self.depth = depth
+        self.url = url
+        self.parent = parent
+
+    @property
+    def host(self):
+        parsed_url = urlparse(self.url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    def __reduce__(self):
+        # Much faster to pickle than the generic __slots__ state, which checkpoints do for the whole frontier
+        return FrontierEntry, (self.score, self.depth, self.url, self.parent)
+
+    def __repr__(self):
+        return f"FrontierEntry({self.score!r}, {self.depth!r}, {self.url!r}, parent={self.parent!r})"
+
+
+class Frontier:
+    """Global best-first frontier shared by every host in a crawl.
+
+    URLs are queued per host. Hosts that may be fetched now sit in a ready
+    heap ordered by their best URL; the rest wait in a heap ordered by the time
+    they become ready. Popping therefore only looks at ready hosts and never
+    scans URLs of hosts that are still in their crawl delay. Among equal
+    scores, the URL queued first wins. A URL is only ever queued once,
+    compared in canonical form.
+    """
+
+    def __init__(self, queued=None):
+        self._counter = itertools.count()
+        self._queued = queued if queued is not None else HashedURLSet()
+        self._host_queues = {}  # host -> heap of (-score, seq, entry)
+        self._ready = []  # heap of (-best score, its seq, host); stale entries are skipped
+        self._waiting = []  # heap of (ready time, host)
+        self._waiting_hosts = set()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, url):
+        return url in self._queued
+
+    def push(self, url, score, depth, parent=None):
+        """Queue a URL; returns False if it was queued before."""
+        if not self._queued.add(url):
+            return False
+        self._enqueue(FrontierEntry(score, depth, url, parent))
+        return True
+
+    def entries(self):
+        """Every queued entry, in no particular order."""
+        return [item[2] for queue in self._host_queues.values() for item in queue]
+
+    def snapshot(self, pending=()):
+        """The per-host heaps and the set of URLs ever queued, for checkpoints.
+
+        ``pending`` entries were popped but not yet crawled; they are saved
+        beside the heaps and queued again on restore, so a resumed crawl picks
+        them up. Everything else is restored as saved, without re-pushing or
+        re-hashing a single URL.
+        """
+        return {
+            "host_queues": self._host_queues,
+            "next_seq": next(self._counter),
+            "size": self._size,
+            "queued": self._queued.snapshot(),
+            "pending": [(entry.score, entry.depth, entry.url, entry.parent) for entry in pending],
+        }
+
+    @classmethod
+    def restore(cls, state):
+        """Rebuild a frontier from ``snapshot``."""
+        queued = HashedURLSet()
+        queued.restore(state["queued"])
+        frontier = cls(queued=queued)
+        frontier._counter = itertools.count(state["next_seq"])
+        frontier._host_queues = state["host_queues"]
+        frontier._size = state["size"]
+        # Politeness is restored separately; each host is checked again on the first pop_ready
+        for host in frontier._host_queues:
+            frontier._park(host, 0)
+        for score, depth, url, parent in state["pending"]:
+            queued.add(url)
+            frontier._enqueue(FrontierEntry(score, depth, url, parent))
+        return frontier
+
+    def _enqueue(self, entry):
+        host = entry.host
+        queue = self._host_queues.get(host)
+        if queue is None:
+            queue = self._host_queues[host] = []
+            # A new host may well be ready; the next pop_ready checks it
+            self._park(host, 0)
+        heapq.heappush(queue, (-entry.score, next(self._counter), entry))
+        if host not in self._waiting_hosts and queue[0][2] is entry:
+            self._mark_ready(host)
+        self._size += 1
+
+    def pop_ready(self, ready_at, limit=1):
+        """Pop up to ``limit`` of the best URLs whose hosts are ready to fetch now.
+
+        ``ready_at(host)`` returns the time a host may next be fetched. Never
+        blocks: at most one URL per host is returned per call, and if no host
+        is ready the result is ``([], wait)`` with the seconds until one is.
+        """
+        now = time.time()
+        while self._waiting and self._waiting[0][0] <= now:
+            _, host = heapq.heappop(self._waiting)
+            if host not in self._waiting_hosts:
+                continue
+            host_ready = ready_at(host)
+            if host_ready > now:
+                heapq.heappush(self._waiting, (host_ready, host))
+                continue
+            self._waiting_hosts.discard(host)
+            self._mark_ready(host)
+
+        batch = []
+        while self._ready and len(batch) < limit:
+            neg_score, seq, host = heapq.heappop(self._ready)
+            queue = self._host_queues.get(host)
+            if not queue or host in self._waiting_hosts or queue[0][:2] != (neg_score, seq):
+                continue  # Stale: host emptied, parked or has a better URL queued since
+            host_ready = ready_at(host)
+            if host_ready > now:
+                self._park(host, host_ready)
+                continue
+            batch.append(heapq.heappop(queue)[2])
+            self._size -= 1
+            if queue:
+                # Fetching this URL resets the host's delay, so check it again next round
+                self._park(host, now)
+            else:
+                del self._host_queues[host]
+
+        wait = 0.0
+        if not batch and self._waiting and not self._ready:
+            wait = max(0.0, self._waiting[0][0] - now)
+        return batch, wait
+
+    def _mark_ready(self, host):
+        queue = self._host_queues[host]
+        # Keyed by the host's best URL, so ties across hosts also go to the URL queued first
+        heapq.heappush(self._ready, (queue[0][0], queue[0][1], host))
+
+    def _park(self, host, ready_time):
+        self._waiting_hosts.add(host)
+        heapq.heappush(self._waiting, (ready_time, host))
+
+
+class MultiFrontier:
+    """One best-first Frontier per keyword of a multi-keyword crawl.
+
+    A link is queued for each keyword that ranked it among a page's best, with
+    that keyword's score, so every topic follows its own best links. Batches
+    are taken round-robin across the keywords' frontiers, still at most one URL
+    per host and URL. A URL queued for several keywords is crawled once; later
+    copies are dropped by the crawler's visited check.
+    """
+
+    def __init__(self, keywords, frontiers=None):
+        self.keywords = list(keywords)
+        self.frontiers = frontiers if frontiers is not None else [Frontier() for _ in self.keywords]
+        self._turn = 0  # Keyword whose frontier is asked first next batch
+
+    def __len__(self):
+        return sum(len(frontier) for frontier in self.frontiers)
+
+    def __contains__(self, url):
+        return any(url in frontier for frontier in self.frontiers)
+
+    def push(self, url, score, depth, parent=None, scores=None):
+        """Queue a URL per keyword; returns False if no keyword queued it.
+
+        ``scores`` holds one score per keyword, None for keywords that should
+        not queue the URL. Without it, every keyword queues it with ``score``,
+        as is done for the seeds.
+        """
+        scores = scores if scores is not None else [score] * len(self.frontiers)
+        queued = False
+        for frontier, keyword_score in zip(self.frontiers, scores):
+            if keyword_score is not None:
+                queued = frontier.push(url, keyword_score, depth, parent) or queued
+        return queued
+
+    def entries(self):
+        return [entry for frontier in self.frontiers for entry in frontier.entries()]
+
+    def snapshot(self, pending=()):
+        """Every keyword's frontier for checkpoints; ``pending`` entries go back to the first one."""
+        return {
+            "keywords": self.keywords,
+            "frontiers": [frontier.snapshot(pending if i == 0 else ())
+                          for i, frontier in enumerate(self.frontiers)],
+        }
+
+    @classmethod
+    def restore(cls, state):
+        """Rebuild from ``snapshot``."""
+        return cls(state["keywords"], [Frontier.restore(frontier) for frontier in state["frontiers"]])
+
+    def pop_ready(self, ready_at, limit=1):
+        """Pop up to ``limit`` ready URLs, shared out across the keywords; see Frontier.pop_ready."""
+        batch, hosts, urls, waits = [], set(), set(), []
+        count = len(self.frontiers)
+        # Rotate who goes first, so no keyword always gets the odd share
+        active = [i for i in ((self._turn + j) % count for j in range(count)) if len(self.frontiers[i])]
+        self._turn += 1
+        while active and len(batch) < limit:
+            share = -(-(limit - len(batch)) // len(active))
+            still_active = []
+            for i in active:
+                if len(batch) >= limit:
+                    break
+                frontier = self.frontiers[i]
+                wanted = min(share, limit - len(batch))
+                popped, wait = frontier.pop_ready(ready_at, wanted)
+                if not popped:
+                    waits.append(wait)
+                    continue
+                used = 0  # Entries taken or dropped; handed back ones end this keyword's turn
+                for entry in popped:
+                    if entry.url in urls:
+                        used += 1  # Queued for another keyword too and already in this batch
+                        continue
+                    if entry.host in hosts:
+                        # Another keyword took this host for the batch; hand the URL back
+                        frontier._enqueue(entry)
+                        continue
+                    batch.append(entry)
+                    hosts.add(entry.host)
+                    urls.add(entry.url)
+                    used += 1
+                if used == wanted and len(frontier):
+                    still_active.append(i)
+            active = still_active
+
+        wait = min(waits) if not batch and waits else 0.0
+        return batch, wait
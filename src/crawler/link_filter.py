@@ -0,0 +1,186 @@
+import math
+import re
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+from src.crawler.metrics import get_metrics
+from src.crawler.url_store import canonicalize_url, seen_urls, url_hash
+
+# Applied in this order; each link is counted against the first filter that drops it
+FILTERS = ("duplicate", "seen", "scope", "boilerplate", "robots", "top_k")
+
+DEFAULT_BOILERPLATE = (
+    r"^(mailto|javascript|tel):",
+    # Site pages live at the top of the path; deeper segments such as /wiki/Terms_of_service are articles
+    r"^https?://[^/]+/(login|log-in|signin|sign-in|signup|sign-up|register|logout|account|cart|checkout)([/?#]|$)",
+    r"^https?://[^/]+/(privacy|terms|cookies?|legal|disclaimer|contact|about-us|help|faq|sitemap)([/?#]|$)",
+    r"[?&](action|oldid|diff|printable|share|utm_[a-z]+)=",
+    r"/(Special|Help|Talk|User|User_talk|Wikipedia|Template|Portal|File|Category_talk):",
+    r"\.(pdf|jpe?g|png|gif|svg|zip|gz|mp[34]|css|js)$",
+)
+
+WORD_RE = re.compile(r"[a-z]+")
+
+
+class LinkFilter:
+    """Cheap pre-scoring stage that decides which links get vector similarity.
+
+    Drops duplicates on the page, links already visited or queued, links to
+    hosts outside ``scope``, boilerplate and links robots.txt disallows. The
+    rest are ranked by a lexical score, the weighted overlap of their words with
+    the keyword's vocabulary, and only the best ``top_k`` are kept. ``keyword``
+    may be a list, in which case the keywords' vocabularies are merged.
+
+    Boilerplate is matched by URL pattern, and adaptively: once ``nav_min_pages``
+    pages of a host were seen, a link present on more than ``nav_share`` of them
+    is treated as site navigation.
+
+    ``scope`` is None (any host), "host" (the page's host), "domain" (the page's
+    host and its subdomains) or an iterable of allowed hosts.
+    """
+
+    def __init__(self, keyword, top_k=50, scope=None, robots_cache=None, user_agent="MyCrawler",
+                 boilerplate=DEFAULT_BOILERPLATE, nav_share=0.5, nav_min_pages=5, vocabulary=None,
+                 vocabulary_size=50, max_tracked_links=100_000):
+        self.keyword = keyword
+        self.top_k = top_k
+        self.scope = scope if scope in (None, "host", "domain") else {host.lower() for host in scope}
+        self.robots_cache = robots_cache
+        self.user_agent = user_agent
+        self.boilerplate = re.compile("|".join(f"(?:{pattern})" for pattern in boilerplate), re.IGNORECASE)
+        self.nav_share = nav_share
+        self.nav_min_pages = nav_min_pages
+        self.vocabulary_size = vocabulary_size
+        self._vocabulary = dict(vocabulary) if vocabulary is not None else None
+        self.max_tracked_links = max_tracked_links
+        self._lock = threading.Lock()
+        self._host_pages = Counter()  # host -> pages seen
+        self._link_pages = Counter()  # (host, URL hash) -> pages of that host linking to it
+        self.counters = {"input": 0, "kept": 0, **{name: 0 for name in FILTERS}}
+
+    @property
+    def vocabulary(self):
+        """{word: weight} for the lexical score, built from the word vectors on first use."""
+        if self._vocabulary is None:
+            from src.models.similarity_engine import get_engine
+            keywords = [self.keyword] if isinstance(self.keyword, str) else self.keyword
+            vocabulary = {}
+            for keyword in keywords:
+                for word, weight in get_engine(keyword).vocabulary(self.vocabulary_size).items():
+                    vocabulary[word] = max(weight, vocabulary.get(word, weight))
+            self._vocabulary = vocabulary
+        return self._vocabulary
+
+    def filter(self, links, page_url, seen=()):
+        """Return the (url, context) links worth scoring, best lexical score first.
+
+        ``seen`` holds URL stores (anything supporting ``in``) of links that
+        need no scoring, such as the visited set and the frontier.
+        """
+        removed = dict.fromkeys(FILTERS, 0)
+        page_host = (urlparse(page_url).hostname or "").lower()
+        candidates = self._dedupe(links, removed)
+        nav_links = self._track_navigation(page_host, candidates)
+        # One batched lookup per store instead of one per link
+        urls = [url for url, _ in candidates]
+        already_seen = set()
+        for store in seen:
+            already_seen |= seen_urls(store, [url for url in urls if url not in already_seen])
+
+        kept = []
+        for url, context in candidates:
+            reason = self._drop_reason(url, page_host, already_seen, nav_links)
+            if reason is not None:
+                removed[reason] += 1
+            else:
+                kept.append((url, context))
+
+        if self.top_k is not None and len(kept) > self.top_k:
+            vocabulary = self.vocabulary
+            # sorted is stable, so equal scores keep their order on the page
+            kept = sorted(kept, key=lambda link: -self.lexical_score(link, vocabulary))
+            removed["top_k"] = len(kept) - self.top_k
+            kept = kept[:self.top_k]
+
+        self._record(len(links), len(kept), removed)
+        return kept
+
+    def lexical_score(self, link, vocabulary=None):
+        """Weighted share of a link's distinct words (context and URL) found in the vocabulary."""
+        vocabulary = vocabulary if vocabulary is not None else self.vocabulary
+        url, context = link
+        words = set(WORD_RE.findall(context.lower())) | set(WORD_RE.findall(urlparse(url).path.lower()))
+        if not words:
+            return 0.0
+        return sum(vocabulary.get(word, 0.0) for word in words) / math.sqrt(len(words))
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def _dedupe(self, links, removed):
+        best = {}
+        for url, context in links:
+            key = canonicalize_url(url)
+            if key in best:
+                removed["duplicate"] += 1
+                # Keep the first occurrence, but with the richest context seen for it
+                if len(context) > len(best[key][1]):
+                    best[key] = (best[key][0], context)
+            else:
+                best[key] = (url, context)
+        return list(best.values())
+
+    def _track_navigation(self, page_host, candidates):
+        """Count this page's links per host; returns the hashes of links that look like navigation."""
+        hashes = [url_hash(url) for url, _ in candidates]
+        with self._lock:
+            self._host_pages[page_host] += 1
+            pages = self._host_pages[page_host]
+            for key in hashes:
+                self._link_pages[(page_host, key)] += 1
+            if len(self._link_pages) > self.max_tracked_links:
+                # Forget links seen once; they are not navigation anyway
+                self._link_pages = Counter({key: n for key, n in self._link_pages.items() if n > 1})
+            if pages < self.nav_min_pages:
+                return set()
+            return {key for key in hashes if self._link_pages[(page_host, key)] > self.nav_share * pages}
+
+    def _drop_reason(self, url, page_host, already_seen, nav_links):
+        if url in already_seen:
+            return "seen"
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if not self._in_scope(host, page_host):
+            return "scope"
+        if self.boilerplate.search(url) or url_hash(url) in nav_links:
+            return "boilerplate"
+        if self.robots_cache is not None:
+            # Only hosts whose robots.txt is already cached; never fetch one just to filter
+            parser = self.robots_cache.peek(f"{parsed.scheme}://{parsed.netloc}")
+            if parser is not None and not parser.is_allowed(self.user_agent, url):
+                return "robots"
+        return None
+
+    def _in_scope(self, host, page_host):
+        if self.scope is None:
+            return True
+        if self.scope == "host":
+            return host == page_host
+        if self.scope == "domain":
+            domain = ".".join(page_host.split(".")[-2:])
+            return host == domain or host.endswith("." + domain)
+        return host in self.scope
+
+    def _record(self, total, kept, removed):
+        with self._lock:
+            self.counters["input"] += total
+            self.counters["kept"] += kept
+            for name, count in removed.items():
+                self.counters[name] += count
+        metrics = get_metrics()
+        metrics.inc("links_found", total)
+        for name, count in removed.items():
+            if count:
+                metrics.inc(f"links_filtered_{name}", count)
@@ -0,0 +1,256 @@
+import bisect
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from sub-millisecond parsing to slow fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# One registry per process, shared by every crawler and Celery worker thread
+_metrics = None
+_metrics_lock = threading.Lock()
+_exporter = None
+_profiler = None
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within a bucket."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one counts values above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """Counters and histograms for the stages of the crawl pipeline.
+
+    Stages are timed with ``timer``, which records into a ``<stage>_seconds``
+    histogram; everything else is a counter or an observed value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{stage}_seconds", time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.counters = {}
+            self.histograms = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "uptime_sec": round(time.time() - self.started_at, 3),
+                "pid": os.getpid(),
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self, prefix="crawler"):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_{name}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{prefix}_{name}_sum {histogram.sum}")
+                lines.append(f"{prefix}_{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def get_metrics():
+    """Return the process-wide metrics registry, creating it on first use."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+def timed(stage):
+    """Time a block into the process-wide registry: ``with timed("fetch"): ...``."""
+    return get_metrics().timer(stage)
+
+
+class MetricsExporter:
+    """Write a snapshot of a Metrics registry to a file every ``interval`` seconds.
+
+    ``fmt`` is "json" or "prometheus" (text format, e.g. for the node exporter's
+    textfile collector). Files are replaced atomically, so readers never see a
+    partial snapshot.
+    """
+
+    def __init__(self, path, interval=30, fmt="json", metrics=None):
+        if fmt not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format '{fmt}', expected 'json' or 'prometheus'")
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt
+        self.metrics = metrics if metrics is not None else get_metrics()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def write(self):
+        if self.fmt == "json":
+            content = json.dumps(self.metrics.snapshot(), indent=2)
+        else:
+            content = self.metrics.to_prometheus()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.error(f"Failed to write metrics to {self.path}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+
+def start_metrics_exporter(path, interval=30, fmt="json"):
+    """Start the process-wide exporter; later calls return the running one."""
+    global _exporter
+    with _metrics_lock:
+        if _exporter is None:
+            _exporter = MetricsExporter(path, interval, fmt).start()
+        return _exporter
+
+
+def stop_metrics_exporter():
+    global _exporter
+    with _metrics_lock:
+        exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.stop()
+
+
+class TaskProfiler:
+    """Collect cProfile data per task and merge it into one file per process.
+
+    cProfile only sees the thread that enabled it, so each task thread runs
+    its own profile (``start``/``stop`` around the task) and ``dump`` merges
+    them. Open the result with ``python -m pstats`` or snakeviz.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = None
+
+    def start(self):
+        profile = cProfile.Profile()
+        self._local.profile = profile
+        profile.enable()
+
+    def stop(self):
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        self._local.profile = None
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def dump(self):
+        with self._lock:
+            if self._stats is not None:
+                self._stats.dump_stats(self.path)
+                logging.info(f"Wrote profile to {self.path}")
+
+
+def enable_profiler(directory):
+    """Turn on per-task profiling for this process, written to ``directory``."""
+    global _profiler
+    os.makedirs(directory, exist_ok=True)
+    _profiler = TaskProfiler(os.path.join(directory, f"profile_{os.getpid()}.prof"))
+    return _profiler
+
+
+def get_profiler():
+    """The process's TaskProfiler, or None when profiling is off."""
+    return _profiler
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from src.crawler.result_sink import connect, get_result_sink
+
+# Kept apart from results.sqlite3, which is purged at the start of every fresh crawl
+DEFAULT_PAGE_CACHE_PATH = "page_cache.sqlite3"
+
+PUT_SQL = ("INSERT OR REPLACE INTO PageCache (url, etag, last_modified, body_hash, relevance_score, links_found, "
+           "context_snippet, links, fetched_at, scoring_key, keyword_scores) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+REFRESH_SQL = ("UPDATE PageCache SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+               "fetched_at = ? WHERE url = ?")
+
+# What a conditional fetch returned: status 200 with the body, or 304 with html None.
+# fetch_sec is how long the fetch took, including robots and politeness waits, when known
+FetchedPage = namedtuple("FetchedPage", ["status", "html", "etag", "last_modified", "fetch_sec"], defaults=(None,))
+
+# Added after the table first shipped; older cache files get them on open
+ADDED_COLUMNS = (("scoring_key", "TEXT"), ("keyword_scores", "TEXT"))
+
+# What the last crawl stored for a URL; links is None if its children were never scored,
+# keyword_scores is None unless the crawl scored several keywords
+CachedPage = namedtuple("CachedPage", [
+    "url", "etag", "last_modified", "body_hash", "relevance_score", "links_found", "context_snippet", "links",
+    "keyword_scores",
+])
+
+
+def body_hash(html):
+    return hashlib.blake2b(html.encode("utf-8", "replace"), digest_size=16).hexdigest()
+
+
+def conditional_headers(cached):
+    """If-None-Match / If-Modified-Since headers for revalidating a cached page."""
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+class PageCache:
+    """Validators, body hash, score and scored links of every crawled page.
+
+    A re-crawl sends conditional requests built from the stored validators.
+    When the server answers 304, or the body hashes the same as last time,
+    the stored score and links are reused and the page is neither parsed
+    nor scored again. Writes are queued to the database's ResultSink and
+    committed in batches by its writer thread, off the crawl path.
+
+    ``scoring_key`` identifies what the stored results were scored for (the
+    keywords and horizon); rows stored under another key are treated as
+    missing, so a re-crawl for a different keyword scores every page afresh.
+    """
+
+    def __init__(self, db_path=DEFAULT_PAGE_CACHE_PATH, scoring_key=None):
+        self.db_path = db_path
+        self.scoring_key = scoring_key
+        self._lock = threading.Lock()
+        self.counters = {"new": 0, "changed": 0, "not_modified": 0, "unchanged": 0}
+        conn = connect(db_path)
+        try:
+            conn.execute('''CREATE TABLE IF NOT EXISTS PageCache (
+                                url TEXT PRIMARY KEY,
+                                etag TEXT,
+                                last_modified TEXT,
+                                body_hash TEXT NOT NULL,
+                                relevance_score REAL NOT NULL,
+                                links_found INTEGER NOT NULL,
+                                context_snippet TEXT NOT NULL,
+                                links TEXT,
+                                fetched_at REAL NOT NULL,
+                                scoring_key TEXT,
+                                keyword_scores TEXT
+                            )''')
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(PageCache)")}
+            for name, column_type in ADDED_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE PageCache ADD COLUMN {name} {column_type}")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_many(self, urls):
+        """Return {url: CachedPage} for the URLs crawled before under this cache's scoring key."""
+        urls = list(urls)
+        if not urls:
+            return {}
+        try:
+            conn = connect(self.db_path)
+            try:
+                rows = conn.execute(
+                    "SELECT url, etag, last_modified, body_hash, relevance_score, links_found, context_snippet, links, "
+                    f"keyword_scores FROM PageCache WHERE url IN ({', '.join('?' * len(urls))}) AND scoring_key IS ?",
+                    urls + [self.scoring_key]).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to read page cache: {e}")
+            return {}
+        cached = {}
+        for row in rows:
+            links = json.loads(row[7]) if row[7] is not None else None
+            keyword_scores = json.loads(row[8]) if row[8] is not None else None
+            cached[row[0]] = CachedPage(*row[:7], links, keyword_scores)
+        return cached
+
+    def get(self, url):
+        return self.get_many([url]).get(url)
+
+    def is_unchanged(self, url, fetched, cached):
+        """Whether a fetched page can reuse its cached result; counts the outcome."""
+        if cached is None:
+            outcome = "new"
+        elif fetched.status == 304:
+            outcome = "not_modified"
+        elif body_hash(fetched.html) == cached.body_hash:
+            outcome = "unchanged"
+        else:
+            outcome = "changed"
+        with self._lock:
+            self.counters[outcome] += 1
+        if outcome in ("not_modified", "unchanged"):
+            logging.info(f"Reusing stored result for {url} ({outcome})")
+            return True
+        return False
+
+    def put(self, url, fetched, relevance_score, links_found, context_snippet, links=None, keyword_scores=None):
+        """Store a freshly processed page.
+
+        ``links`` are its scored (score, url) children and ``keyword_scores``
+        its score for each keyword of a multi-keyword crawl.
+        """
+        get_result_sink(self.db_path).put(
+            (url, fetched.etag, fetched.last_modified, body_hash(fetched.html), relevance_score, links_found,
+             context_snippet, json.dumps(links) if links is not None else None, time.time(), self.scoring_key,
+             json.dumps(keyword_scores) if keyword_scores is not None else None), PUT_SQL)
+
+    def refresh(self, url, fetched):
+        """Record new validators for a page whose content did not change."""
+        get_result_sink(self.db_path).put((fetched.etag, fetched.last_modified, time.time(), url), REFRESH_SQL)
+
+    def flush(self, timeout=None):
+        """Block until every queued write is committed."""
+        return get_result_sink(self.db_path).flush(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        revisited = stats["changed"] + stats["not_modified"] + stats["unchanged"]
+        stats["reuse_rate"] = round((stats["not_modified"] + stats["unchanged"]) / revisited, 4) if revisited else 0.0
+        return stats
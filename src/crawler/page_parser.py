@@ -0,0 +1,149 @@
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # Fall back to the standard library parser
+    etree = None
+
+# Elements whose text never reaches the reader
+INVISIBLE_TAGS = {"script", "style", "noscript", "template"}
+
+
+class Anchor:
+    """A link found on a page with the text immediately around it."""
+
+    __slots__ = ("href", "text", "preceding_text", "following_text")
+
+    def __init__(self, href, text, preceding_text, following_text):
+        self.href = href
+        self.text = text
+        self.preceding_text = preceding_text
+        self.following_text = following_text
+
+
+class PageRecord:
+    """Everything scoring and link discovery need from one parse of a page."""
+
+    __slots__ = ("url", "strings", "anchors")
+
+    def __init__(self, url, strings, anchors):
+        self.url = url
+        self.strings = strings  # Visible, non-blank text nodes in document order
+        self.anchors = anchors
+
+    @property
+    def text(self):
+        return " ".join(self.strings)
+
+    @property
+    def words(self):
+        return self.text.split()
+
+
+class _PageBuilder:
+    """Parser target that collects visible text and anchor context in one pass.
+
+    Works both as an lxml parser target and behind the stdlib HTMLParser.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self.anchors = []  # [href, text parts, index of preceding string, index of following string]
+        self._open_anchor = None
+        self._invisible_depth = 0
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag in INVISIBLE_TAGS:
+            self._invisible_depth += 1
+        elif tag == "a":
+            # Anchors cannot nest, so a new one implicitly closes the last
+            self._close_anchor()
+            href = attrib.get("href")
+            if href is not None:
+                self._open_anchor = [href, [], len(self.strings) - 1, None]
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in INVISIBLE_TAGS:
+            self._invisible_depth = max(0, self._invisible_depth - 1)
+        elif tag == "a":
+            self._close_anchor()
+
+    def data(self, data):
+        if self._invisible_depth or not data.strip():
+            return
+        self.strings.append(data)
+        if self._open_anchor is not None:
+            self._open_anchor[1].append(data.strip())
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self._close_anchor()
+        strings = self.strings
+        anchors = []
+        for href, parts, preceding, following in self.anchors:
+            anchors.append(Anchor(
+                href,
+                " ".join(parts),
+                strings[preceding] if preceding >= 0 else "",
+                strings[following] if following < len(strings) else "",
+            ))
+        return strings, anchors
+
+    def _close_anchor(self):
+        if self._open_anchor is not None:
+            self._open_anchor[3] = len(self.strings)
+            self.anchors.append(self._open_anchor)
+            self._open_anchor = None
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _parse_with_lxml(html):
+    builder = _PageBuilder()
+    parser = etree.HTMLParser(target=builder, remove_comments=True)
+    parser.feed(html)
+    return parser.close()
+
+
+def _parse_with_stdlib(html):
+    builder = _PageBuilder()
+    parser = _StdlibParser(builder)
+    parser.feed(html)
+    parser.close()
+    return builder.close()
+
+
+def parse_page(html, url=None):
+    """Parse a page once, collecting its visible text and every link's context.
+
+    Uses lxml when it is installed and the standard library parser otherwise.
+    """
+    if etree is not None:
+        try:
+            strings, anchors = _parse_with_lxml(html)
+            return PageRecord(url, strings, anchors)
+        except (etree.Error, ValueError):
+            pass
+    strings, anchors = _parse_with_stdlib(html)
+    return PageRecord(url, strings, anchors)
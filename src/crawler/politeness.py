@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+# One scheduler per process so every crawler and Celery worker thread shares politeness state
+_shared = None
+_shared_lock = threading.Lock()
+
+
+class PolitenessScheduler:
+    """Per-host crawl delays, shared safely between threads.
+
+    A host may be fetched once its delay has passed since the last fetch.
+    ``try_acquire`` checks and reserves a host atomically without blocking, so
+    callers can move on to another host instead of sleeping.
+    """
+
+    def __init__(self, default_delay=1):
+        self.default_delay = default_delay
+        self._lock = threading.Lock()
+        self._last_access = {}  # host -> time of last fetch
+        self._delays = {}  # host -> delay from robots.txt Crawl-delay
+
+    def set_delay(self, host, delay):
+        with self._lock:
+            self._delays[host] = delay
+
+    def update_from_robots(self, host, parser, user_agent):
+        """Use the robots.txt Crawl-delay for a host, or the default if it has none."""
+        crawl_delay = parser.get_crawl_delay(user_agent)
+        self.set_delay(host, crawl_delay if crawl_delay is not None else self.default_delay)
+
+    def delay_for(self, host):
+        return self._delays.get(host, self.default_delay)
+
+    def ready_at(self, host):
+        """Time at which a host may next be fetched."""
+        return self._last_access.get(host, 0) + self.delay_for(host)
+
+    def try_acquire(self, host):
+        """Reserve a host if it is ready now; returns (acquired, seconds to wait otherwise)."""
+        with self._lock:
+            now = time.time()
+            wait = self.ready_at(host) - now
+            if wait > 0:
+                return False, wait
+            self._last_access[host] = now
+            return True, 0.0
+
+    def acquire(self, host):
+        """Block until the host is ready and reserve it; returns the time waited."""
+        waited = 0.0
+        while True:
+            acquired, wait = self.try_acquire(host)
+            if acquired:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, host):
+        """Like acquire, but yields to the event loop while waiting."""
+        waited = 0.0
+        while True:
+            acquired, wait = self.try_acquire(host)
+            if acquired:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def snapshot(self):
+        """Plain-dict copy of the state, for checkpoints."""
+        with self._lock:
+            return {"last_access": dict(self._last_access), "delays": dict(self._delays)}
+
+    def restore(self, state):
+        with self._lock:
+            self._last_access.update(state.get("last_access", {}))
+            self._delays.update(state.get("delays", {}))
+
+
+def get_shared_politeness(default_delay=1):
+    """Return the process-wide scheduler, creating it on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PolitenessScheduler(default_delay)
+        return _shared
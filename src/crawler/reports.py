@@ -0,0 +1,225 @@
+"""Streaming reports over CrawlResults.
+
+Rows are read through a cursor in chunks and written as they arrive, so an
+export runs in constant memory however large the crawl was. Example:
+    python -m src.crawler.reports results.sqlite3 top.csv --order relevance --limit 100
+    python -m src.crawler.reports results.sqlite3 wiki.jsonl.gz --host en.wikipedia.org --max-depth 1
+    python -m src.crawler.reports results.sqlite3 topic.csv --keyword database --order relevance --limit 100
+"""
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+
+from src.crawler.result_sink import DEFAULT_DB_PATH, connect
+
+COLUMNS = ("url", "depth", "links_found", "relevance_score", "context_snippet", "duration_sec", "total_duration_sec")
+DEFAULT_COLUMNS = ("url", "depth", "links_found", "relevance_score", "context_snippet")
+
+INDEXES = {
+    "idx_crawlresults_url": ("CrawlResults", "url"),
+    "idx_crawlresults_depth": ("CrawlResults", "depth, relevance_score"),
+    "idx_crawlresults_relevance": ("CrawlResults", "relevance_score"),
+    # Only present in databases written by a multi-keyword crawl
+    "idx_keywordscores_keyword": ("KeywordScores", "keyword, relevance_score"),
+    "idx_keywordscores_url": ("KeywordScores", "url, depth"),
+}
+
+ORDERS = {"relevance": "relevance_score", "depth": "depth", "url": "url", "id": "id"}
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def ensure_indexes(conn):
+    """Create the indexes the report queries filter and sort on, for the tables that exist."""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for name, (table, columns) in INDEXES.items():
+        if table in tables:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    conn.commit()
+
+
+def build_query(columns=DEFAULT_COLUMNS, min_score=None, depth=None, max_depth=None, host=None,
+                order=None, descending=None, limit=None, keyword=None):
+    """Build the SELECT for a filtered, sorted report; returns (sql, params).
+
+    ``host`` matches http and https URLs on that host through a range scan on
+    the url index instead of a LIKE over every row. With ``keyword``, pages
+    of a multi-keyword crawl are reported with their score for that keyword
+    from KeywordScores instead of their best score over all keywords.
+    """
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown CrawlResults columns: {sorted(unknown)}")
+
+    def column(name):
+        return f"k.{name}" if keyword is not None and name == "relevance_score" else f"r.{name}"
+
+    where, params = [], []
+    source = "CrawlResults r"
+    if keyword is not None:
+        source += " JOIN KeywordScores k ON k.url = r.url AND k.depth = r.depth AND k.keyword = ?"
+        params.append(keyword)
+    if min_score is not None:
+        where.append(f"{column('relevance_score')} >= ?")
+        params.append(min_score)
+    if depth is not None:
+        where.append("r.depth = ?")
+        params.append(depth)
+    if max_depth is not None:
+        where.append("r.depth <= ?")
+        params.append(max_depth)
+    if host:
+        # "/" sorts just before "0", so [scheme://host/, scheme://host0) holds exactly that host's URLs
+        where.append("((r.url >= ? AND r.url < ?) OR (r.url >= ? AND r.url < ?))")
+        params += [f"http://{host}/", f"http://{host}0", f"https://{host}/", f"https://{host}0"]
+
+    sql = f"SELECT {', '.join(column(name) for name in columns)} FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if order is not None:
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {sorted(ORDERS)}")
+        # Highest relevance first unless told otherwise; everything else ascending
+        descending = order == "relevance" if descending is None else descending
+        sql += f" ORDER BY {column(ORDERS[order])} {'DESC' if descending else 'ASC'}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def iter_rows(db_path=DEFAULT_DB_PATH, chunk_size=1000, **query):
+    """Yield report rows, fetching ``chunk_size`` of them from SQLite at a time."""
+    sql, params = build_query(**query)
+    conn = connect(db_path)
+    try:
+        ensure_indexes(conn)
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def write_csv(rows, path, headers):
+    count = 0
+    with _open_text(path) as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_jsonl(rows, path, columns):
+    count = 0
+    with _open_text(path) as file:
+        for row in rows:
+            file.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def write_parquet(rows, path, columns, chunk_size=10000, compression="zstd"):
+    """Write row groups of ``chunk_size`` rows to a compressed Parquet file (needs pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet reports need pyarrow: pip install pyarrow") from e
+
+    count = 0
+    writer = None
+    try:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                writer = _write_parquet_chunk(pa, pq, writer, path, columns, chunk, compression)
+                count += len(chunk)
+                chunk = []
+        if chunk or writer is None:
+            writer = _write_parquet_chunk(pa, pq, writer, path, columns, chunk, compression)
+            count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def _write_parquet_chunk(pa, pq, writer, path, columns, chunk, compression):
+    table = pa.table({column: [row[i] for row in chunk] for i, column in enumerate(columns)})
+    if writer is None:
+        writer = pq.ParquetWriter(path, table.schema, compression=compression)
+    writer.write_table(table)
+    return writer
+
+
+def format_for(path):
+    """Infer the output format from a file name (a trailing .gz is ignored)."""
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lstrip(".").lower()
+    return {"csv": "csv", "jsonl": "jsonl", "json": "jsonl", "parquet": "parquet"}.get(extension, "csv")
+
+
+def export(path, db_path=DEFAULT_DB_PATH, fmt=None, headers=None, chunk_size=1000, **query):
+    """Stream a filtered, sorted CrawlResults query to a CSV, JSONL or Parquet file.
+
+    CSV and JSONL are gzip-compressed when ``path`` ends in .gz. Returns the
+    number of rows written.
+    """
+    fmt = fmt or format_for(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format '{fmt}', expected one of {FORMATS}")
+    columns = tuple(query.pop("columns", DEFAULT_COLUMNS))
+    rows = iter_rows(db_path, chunk_size, columns=columns, **query)
+    if fmt == "csv":
+        count = write_csv(rows, path, headers or columns)
+    elif fmt == "jsonl":
+        count = write_jsonl(rows, path, columns)
+    else:
+        count = write_parquet(rows, path, columns, chunk_size=max(chunk_size, 10000))
+    logging.info(f"Report with {count} rows saved to {path}")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", nargs="?", default=DEFAULT_DB_PATH)
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the output file name")
+    parser.add_argument("--columns", nargs="+", default=list(DEFAULT_COLUMNS), choices=COLUMNS)
+    parser.add_argument("--min-score", type=float, default=None)
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--host", default=None, help="only URLs on this host, e.g. en.wikipedia.org")
+    parser.add_argument("--keyword", default=None, help="score of this keyword in a multi-keyword crawl")
+    parser.add_argument("--order", choices=sorted(ORDERS), default=None)
+    parser.add_argument("--ascending", action="store_true", help="sort ascending (relevance sorts descending)")
+    parser.add_argument("--limit", type=int, default=None, help="keep only the first N rows, e.g. top-N")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    count = export(args.output, args.database, fmt=args.format, chunk_size=args.chunk_size,
+                   columns=args.columns, min_score=args.min_score, depth=args.depth, max_depth=args.max_depth,
+                   host=args.host, order=args.order, descending=False if args.ascending else None,
+                   limit=args.limit, keyword=args.keyword)
+    print(f"Wrote {count} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import atexit
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from src.crawler.metrics import get_metrics
+
+DEFAULT_DB_PATH = "results.sqlite3"
+
+INSERT_SQL = '''INSERT INTO CrawlResults (url, depth, links_found, relevance_score, context_snippet, duration_sec, total_duration_sec)
+                VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+# Per-keyword page scores of a multi-keyword crawl
+KEYWORD_SCORES_SQL = '''INSERT INTO KeywordScores (url, depth, keyword, relevance_score) VALUES (?, ?, ?, ?)'''
+
+# Pragmas for a database shared by several writers (our sink and Celery's result backend).
+# WAL lets readers and the writer proceed together and is remembered by the database file.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+_STOP = object()
+
+# One sink per process and database file, shared by every crawler thread
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+def connect(db_path=DEFAULT_DB_PATH):
+    """Open a connection with the shared pragmas applied."""
+    conn = sqlite3.connect(db_path, timeout=5)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ResultSink:
+    """Buffer CrawlResults rows and write them in batches from one writer thread.
+
+    Rows for other tables of the same database (such as KeywordScores) can be
+    queued with their own statement; they share the writer thread and its
+    transactions instead of competing for the database lock from a second one.
+    Other databases (such as the page cache) get a sink of their own.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=100, flush_interval=1.0, max_queue=10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.failed_rows = 0
+        self.last_flush_sec = 0.0
+        self.max_flush_sec = 0.0
+        self.total_flush_sec = 0.0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="result-sink", daemon=True)
+                self._thread.start()
+        return self
+
+    def put(self, row, sql=INSERT_SQL):
+        """Queue one CrawlResults row (a tuple in INSERT_SQL column order), or a row for ``sql``."""
+        self.start()
+        self._queue.put((sql, row))
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been committed."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Write out everything still queued and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth,
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "failed_rows": self.failed_rows,
+            "last_flush_sec": round(self.last_flush_sec, 4),
+            "max_flush_sec": round(self.max_flush_sec, 4),
+            "avg_flush_sec": round(self.total_flush_sec / self.batches_written, 4) if self.batches_written else 0.0,
+        }
+
+    def _run(self):
+        conn = connect(self.db_path)
+        batch, waiters = [], []
+        batch_started = 0.0
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+
+                stop = item is _STOP
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item is not None and not stop:
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.append(item)
+
+                due = time.monotonic() - batch_started >= self.flush_interval
+                if batch and (stop or waiters or due or len(batch) >= self.batch_size):
+                    self._write(conn, batch)
+                    batch = []
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        start = time.perf_counter()
+        try:
+            with conn:
+                # Consecutive rows of one statement go in one executemany; rows keep their queued order
+                for sql, items in itertools.groupby(batch, key=lambda item: item[0]):
+                    conn.executemany(sql, [row for _, row in items])
+            self.rows_written += len(batch)
+            self.batches_written += 1
+        except sqlite3.Error as e:
+            self.failed_rows += len(batch)
+            logging.error(f"Failed to write {len(batch)} rows to {self.db_path}: {e}")
+        elapsed = time.perf_counter() - start
+        get_metrics().observe("db_write_seconds", elapsed)
+        self.last_flush_sec = elapsed
+        self.max_flush_sec = max(self.max_flush_sec, elapsed)
+        self.total_flush_sec += elapsed
+
+
+def get_result_sink(db_path=DEFAULT_DB_PATH):
+    """Return the process-wide sink for a database file, starting it on first use."""
+    with _sinks_lock:
+        sink = _sinks.get(db_path)
+        if sink is None:
+            sink = _sinks[db_path] = ResultSink(db_path)
+        return sink
+
+
+def close_result_sinks():
+    """Flush and stop every sink in this process."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+        logging.info(f"Closed result sink for {sink.db_path}: {sink.stats()}")
+
+
+atexit.register(close_result_sinks)
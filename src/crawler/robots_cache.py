@@ -0,0 +1,203 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from robotexclusionrulesparser import RobotExclusionRulesParser
+
+from src.crawler.result_sink import connect
+
+# One cache per process, user agent and database, shared by every crawler and Celery worker thread
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+class RobotsCache:
+    """TTL- and size-bounded cache of parsed robots.txt files.
+
+    Successful fetches are kept for ``ttl`` seconds. 4xx/5xx responses and
+    network errors are cached as allow-all for the shorter ``negative_ttl``,
+    so a flaky host is retried without being refetched on every page.
+    Concurrent lookups for the same host share a single fetch. With
+    ``db_path`` set, fetched files are also stored in SQLite so every worker
+    process on a node can reuse them.
+    """
+
+    def __init__(self, user_agent="MyCrawler", ttl=3600, negative_ttl=600, maxsize=10000, db_path=None,
+                 timeout=5):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self.timeout = timeout
+        self._entries = OrderedDict()  # base_url -> (parser, expires_at)
+        self._in_flight = {}  # base_url -> Event set when its fetch finishes
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0, "misses": 0, "disk_hits": 0, "fetches": 0, "coalesced": 0,
+            "negative": 0, "expired": 0, "evictions": 0,
+        }
+        if db_path:
+            self._init_db()
+
+    def get(self, base_url):
+        """Return the parser for a host, fetching robots.txt at most once per TTL.
+
+        Each call counts once: a hit, or a miss that was then fetched, read
+        from disk or coalesced with another thread's fetch.
+        """
+        first = True
+        while True:
+            with self._lock:
+                parser = self._lookup(base_url, count=first)
+                if parser is not None:
+                    return parser
+                event = self._in_flight.get(base_url)
+                if event is None:
+                    event = self._in_flight[base_url] = threading.Event()
+                    break
+                if first:
+                    self.counters["coalesced"] += 1
+                first = False
+            # Another thread is fetching this host; wait for it and look again
+            event.wait(self.timeout * 2)
+
+        try:
+            parser, ttl = self._load_from_disk(base_url) or self._fetch(base_url)
+            with self._lock:
+                self._store(base_url, parser, ttl)
+            return parser
+        finally:
+            with self._lock:
+                self._in_flight.pop(base_url, None)
+            event.set()
+
+    def peek(self, base_url):
+        """Return the parser for a host if it is cached and fresh, without fetching or counting."""
+        with self._lock:
+            entry = self._entries.get(base_url)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _lookup(self, base_url, count=True):
+        entry = self._entries.get(base_url)
+        if entry is None:
+            self.counters["misses"] += count
+            return None
+        parser, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[base_url]
+            self.counters["expired"] += count
+            self.counters["misses"] += count
+            return None
+        self._entries.move_to_end(base_url)
+        self.counters["hits"] += count
+        return parser
+
+    def _store(self, base_url, parser, ttl):
+        self._entries[base_url] = (parser, time.time() + ttl)
+        self._entries.move_to_end(base_url)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _fetch(self, base_url):
+        import requests
+
+        robots_url = f"{base_url}/robots.txt"
+        self._count("fetches")
+        try:
+            response = requests.get(robots_url, headers={"User-Agent": self.user_agent}, timeout=self.timeout)
+            status, body = response.status_code, response.text if response.status_code == 200 else ""
+        except requests.RequestException as e:
+            logging.error(f"Failed to fetch robots.txt from {robots_url}: {e}")
+            status, body = None, ""
+
+        if status != 200:
+            # Default to allowing all if robots.txt is missing or the host is failing
+            self._count("negative")
+        self._save_to_disk(base_url, status, body)
+        return self._parse(body), self._ttl_for(status)
+
+    def _ttl_for(self, status):
+        return self.ttl if status == 200 else self.negative_ttl
+
+    @staticmethod
+    def _parse(body):
+        parser = RobotExclusionRulesParser()
+        parser.parse(body)
+        return parser
+
+    def _init_db(self):
+        conn = connect(self.db_path)
+        try:
+            conn.execute('''CREATE TABLE IF NOT EXISTS RobotsCache (
+                                base_url TEXT PRIMARY KEY,
+                                status INTEGER,
+                                body TEXT NOT NULL,
+                                fetched_at REAL NOT NULL
+                            )''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _load_from_disk(self, base_url):
+        if not self.db_path:
+            return None
+        try:
+            conn = connect(self.db_path)
+            try:
+                row = conn.execute("SELECT status, body, fetched_at FROM RobotsCache WHERE base_url = ?",
+                                   (base_url,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to read robots cache for {base_url}: {e}")
+            return None
+        if row is None:
+            return None
+        status, body, fetched_at = row
+        remaining = fetched_at + self._ttl_for(status) - time.time()
+        if remaining <= 0:
+            return None
+        self._count("disk_hits")
+        return self._parse(body), remaining
+
+    def _save_to_disk(self, base_url, status, body):
+        if not self.db_path:
+            return
+        try:
+            conn = connect(self.db_path)
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO RobotsCache (base_url, status, body, fetched_at) "
+                                 "VALUES (?, ?, ?, ?)", (base_url, status, body, time.time()))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store robots cache for {base_url}: {e}")
+
+
+def get_shared_robots_cache(user_agent="MyCrawler", db_path=None):
+    """Return the process-wide robots cache for a user agent and database, creating it on first use."""
+    key = (user_agent, db_path)
+    with _shared_lock:
+        cache = _shared.get(key)
+        if cache is None:
+            cache = _shared[key] = RobotsCache(user_agent, db_path=db_path)
+        return cache
@@ -0,0 +1,102 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+
+from src.models.model_registry import preload
+from src.models.similarity_cache import DEFAULT_MAXSIZE, configure_similarity_cache, worker_cache_path
+
+BACKENDS = ("process", "thread")
+
+# One executor per process, shared by every crawler and Celery thread in it
+_shared_executor = None
+_shared_lock = threading.Lock()
+
+
+def _init_worker(model_name, cache_size, cache_path):
+    """Load the model and warm the similarity cache once when a scoring process starts."""
+    preload(model_name)
+    cache = configure_similarity_cache(cache_size, cache_path)
+    if cache_path:
+        # Only the parent writes cache_path; each worker saves its own file on exit,
+        # which the next load of cache_path merges in
+        Finalize(cache, cache.save, args=(worker_cache_path(cache_path),), exitpriority=10)
+
+
+def _score_batch(pairs, keyword, use_table=True):
+    """Score a batch of (url, snippet) pairs inside a worker."""
+    from src.models.similarities import batch_similarities
+    return batch_similarities(pairs, keyword, use_table)
+
+
+class ScoringExecutor:
+    """Long-lived pool that scores link snippets against a keyword."""
+
+    def __init__(self, max_workers=10, backend="process", model_name="en_core_web_md",
+                 cache_size=DEFAULT_MAXSIZE, cache_path=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown scoring backend '{backend}', expected one of {BACKENDS}")
+        self.max_workers = max_workers
+        self.backend = backend
+        self.model_name = model_name
+
+        if backend == "process":
+            # Spawn rather than fork: we are often started from a Celery thread,
+            # and forking a threaded process can copy held locks into the child.
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, cache_size, cache_path),
+            )
+        else:
+            # Threads share the process-wide similarity cache with the crawler
+            preload(model_name)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scoring")
+        logging.info(f"Started {backend} scoring executor with {max_workers} workers")
+
+    def score(self, pairs, keyword, chunk_size=64, use_table=True):
+        """Yield (url, similarity values) for each pair as its batch finishes.
+
+        ``use_table=False`` keeps the workers from scoring with relevance tables.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return
+        futures = [
+            self._executor.submit(_score_batch, pairs[i:i + chunk_size], keyword, use_table)
+            for i in range(0, len(pairs), chunk_size)
+        ]
+        for future in as_completed(futures):
+            for result in future.result():
+                yield result
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        logging.info(f"Stopped {self.backend} scoring executor")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+def get_scoring_executor(max_workers=10, backend="process", cache_size=DEFAULT_MAXSIZE, cache_path=None):
+    """Return the process-wide executor, creating it on first use."""
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = ScoringExecutor(max_workers=max_workers, backend=backend,
+                                               cache_size=cache_size, cache_path=cache_path)
+        return _shared_executor
+
+
+def shutdown_scoring_executor():
+    """Tear down the process-wide executor, if one was started."""
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is not None:
+            _shared_executor.shutdown()
+            _shared_executor = None
@@ -0,0 +1,400 @@
+import hashlib
+import logging
+import math
+import os
+import pickle
+import sqlite3
+import threading
+from array import array
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.crawler.result_sink import connect
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url):
+    """Normalize a URL so trivially different spellings of one page compare equal.
+
+    Lowercases the scheme and host, drops default ports, the fragment and a
+    trailing slash, and sorts the query parameters.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{userinfo}@{host}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_hash(url):
+    """64-bit hash of the canonical form of a URL."""
+    digest = hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class HashedURLSet:
+    """Exact seen-URL set storing one 64-bit hash per URL in an open-addressed array.
+
+    The table doubles once it is half full, so it uses 16 to 32 bytes per URL
+    depending on where it is in that cycle, against well over 100 for a set of
+    URL strings. Two distinct URLs colliding on 64 bits is
+    possible but vanishingly unlikely at crawl sizes.
+    """
+
+    _EMPTY = 0
+    _MAX_LOAD = 0.5
+
+    def __init__(self, capacity=1024, path=None):
+        size = 1
+        while size < capacity / self._MAX_LOAD:
+            size <<= 1
+        self._table = array("Q", bytes(8 * size))
+        self._count = 0
+        self.path = path
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, url):
+        return self._find(self._key(url))[1]
+
+    def add(self, url):
+        """Add a URL; returns False if it was already present."""
+        key = self._key(url)
+        slot, found = self._find(key)
+        if found:
+            return False
+        self._table[slot] = key
+        self._count += 1
+        if self._count > len(self._table) * self._MAX_LOAD:
+            self._resize(len(self._table) * 2)
+        return True
+
+    def memory_bytes(self):
+        return self._table.itemsize * len(self._table)
+
+    @staticmethod
+    def _key(url):
+        # Zero marks an empty slot, so shift the one URL hash that lands on it
+        return url_hash(url) or 1
+
+    def _find(self, key):
+        table = self._table
+        mask = len(table) - 1
+        slot = key & mask
+        while True:
+            current = table[slot]
+            if current == key:
+                return slot, True
+            if current == self._EMPTY:
+                return slot, False
+            slot = (slot + 1) & mask
+
+    def _resize(self, size):
+        old = self._table
+        self._table = array("Q", bytes(8 * size))
+        mask = size - 1
+        for key in old:
+            if key != self._EMPTY:
+                slot = key & mask
+                while self._table[slot] != self._EMPTY:
+                    slot = (slot + 1) & mask
+                self._table[slot] = key
+
+    def snapshot(self):
+        """The slot array as raw bytes, restored without hashing any URL again."""
+        return {"kind": "exact", "count": self._count, "table": self._table.tobytes()}
+
+    def restore(self, state):
+        """Replace the contents with a ``snapshot``; returns False if it is of another kind."""
+        if not _check_kind(state, "exact", "Seen URL snapshot"):
+            return False
+        table = array("Q")
+        table.frombytes(state["table"])
+        self._table = table
+        self._count = state["count"]
+        return True
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        _atomic_dump(path, self.snapshot())
+
+    def load(self, path=None):
+        state = _load(path or self.path, "exact")
+        if state is None:
+            return
+        self.restore(state)
+        logging.info(f"Loaded {self._count} seen URLs from {path or self.path}")
+
+
+class _BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1, h2):
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, hashes):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(*hashes))
+
+    def add(self, hashes):
+        bits = self.bits
+        for pos in self._positions(*hashes):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class BloomURLSet:
+    """Scalable Bloom filter of seen URLs with a bounded false-positive rate.
+
+    When a filter fills up, a new one twice the size is added with a tighter
+    error rate, so the overall false-positive rate stays under ``error_rate``
+    however many URLs are added. False positives mean an unseen URL is
+    occasionally skipped; seen URLs are never reported as new.
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, capacity=100_000, error_rate=0.001, path=None):
+        self.initial_capacity = capacity
+        self.error_rate = error_rate
+        self.path = path
+        self._filters = [_BloomFilter(capacity, error_rate * (1 - self.TIGHTENING))]
+        self._count = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _hashes(url):
+        digest = hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def __contains__(self, url):
+        hashes = self._hashes(url)
+        return any(hashes in bloom for bloom in self._filters)
+
+    def add(self, url):
+        """Add a URL; returns False if it was (probably) already present."""
+        hashes = self._hashes(url)
+        if any(hashes in bloom for bloom in self._filters):
+            return False
+        current = self._filters[-1]
+        if current.count >= current.capacity:
+            current = _BloomFilter(current.capacity * self.GROWTH, current.error_rate * self.TIGHTENING)
+            self._filters.append(current)
+        current.add(hashes)
+        self._count += 1
+        return True
+
+    def memory_bytes(self):
+        return sum(len(bloom.bits) for bloom in self._filters)
+
+    def snapshot(self):
+        """The filters' bit arrays as raw bytes, restored without hashing any URL again."""
+        return {
+            "kind": "bloom",
+            "count": self._count,
+            "filters": [(b.capacity, b.error_rate, b.count, bytes(b.bits)) for b in self._filters],
+        }
+
+    def restore(self, state):
+        """Replace the contents with a ``snapshot``; returns False if it is of another kind."""
+        if not _check_kind(state, "bloom", "Seen URL snapshot"):
+            return False
+        filters = []
+        for capacity, error_rate, count, bits in state["filters"]:
+            bloom = _BloomFilter(capacity, error_rate)
+            bloom.bits = bytearray(bits)
+            bloom.count = count
+            filters.append(bloom)
+        self._filters = filters
+        self._count = state["count"]
+        return True
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        _atomic_dump(path, self.snapshot())
+
+    def load(self, path=None):
+        state = _load(path or self.path, "bloom")
+        if state is None:
+            return
+        self.restore(state)
+        logging.info(f"Loaded {self._count} seen URLs (Bloom) from {path or self.path}")
+
+
+class SQLiteSeenStore:
+    """Seen-URL set in SQLite, shared by every worker process on a node.
+
+    Stores only the 64-bit URL hash. ``add`` is a single INSERT OR IGNORE, so
+    two workers racing to add the same URL agree on which of them saw it first.
+    Each thread keeps one open connection, and ``contains_many`` checks a whole
+    page of links in one query.
+    """
+
+    # Below SQLite's default limit of 999 bound parameters per statement
+    QUERY_CHUNK = 500
+
+    def __init__(self, db_path="seen.sqlite3"):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS SeenURLs (hash INTEGER PRIMARY KEY) WITHOUT ROWID")
+        conn.commit()
+
+    def __getstate__(self):
+        return {"db_path": self.db_path}
+
+    def __setstate__(self, state):
+        self.db_path = state["db_path"]
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.db_path)
+        return conn
+
+    def close(self):
+        """Close this thread's connection; the next call opens a new one."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _key(url):
+        # SQLite integers are signed 64-bit
+        value = url_hash(url)
+        return value - (1 << 64) if value >= 1 << 63 else value
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM SeenURLs").fetchone()[0]
+
+    def __contains__(self, url):
+        row = self._connect().execute("SELECT 1 FROM SeenURLs WHERE hash = ?", (self._key(url),)).fetchone()
+        return row is not None
+
+    def contains_many(self, urls):
+        """Return the set of the given URLs that were seen, in one query per QUERY_CHUNK URLs."""
+        by_key = {}
+        for url in urls:
+            by_key.setdefault(self._key(url), []).append(url)
+        keys = list(by_key)
+        found = set()
+        conn = self._connect()
+        for i in range(0, len(keys), self.QUERY_CHUNK):
+            chunk = keys[i:i + self.QUERY_CHUNK]
+            rows = conn.execute(f"SELECT hash FROM SeenURLs WHERE hash IN ({', '.join('?' * len(chunk))})", chunk)
+            for (key,) in rows:
+                found.update(by_key[key])
+        return found
+
+    def add(self, url):
+        """Add a URL; returns False if any worker added it before."""
+        return bool(self.add_many([url]))
+
+    def add_many(self, urls):
+        """Add URLs in one transaction, returning those no worker had seen yet."""
+        new_urls = []
+        try:
+            with self._connect() as conn:
+                for url in urls:
+                    cursor = conn.execute("INSERT OR IGNORE INTO SeenURLs (hash) VALUES (?)", (self._key(url),))
+                    if cursor.rowcount == 1:
+                        new_urls.append(url)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record seen URLs in {self.db_path}: {e}")
+            new_urls = []
+        return new_urls
+
+    def memory_bytes(self):
+        return 0  # Everything lives on disk
+
+    def snapshot(self):
+        return {"kind": "sqlite"}  # The table itself is the persistent state
+
+    def restore(self, state):
+        return _check_kind(state, "sqlite", "Seen URL snapshot")
+
+    def save(self, path=None):
+        pass  # Committed on every add
+
+
+def seen_urls(store, urls):
+    """The subset of ``urls`` in a URL store, in one batched lookup when the store supports it."""
+    if hasattr(store, "contains_many"):
+        return store.contains_many(urls)
+    return {url for url in urls if url in store}
+
+
+def host_partition(url, partitions):
+    """Stable partition number for a URL's host, so each host stays on one queue."""
+    host = (urlsplit(url).hostname or "").lower()
+    digest = hashlib.blake2b(host.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % partitions
+
+
+def _atomic_dump(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _load(path, kind):
+    try:
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        logging.error(f"Failed to load seen URLs from {path}: {e}")
+        return None
+    return state if _check_kind(state, kind, f"Seen URL file {path}") else None
+
+
+def _check_kind(state, kind, source):
+    if state.get("kind") != kind:
+        logging.error(f"{source} holds a '{state.get('kind')}' store, expected '{kind}'")
+        return False
+    return True
+
+
+def make_url_store(kind="exact", capacity=100_000, error_rate=0.001, path=None):
+    """Build a seen-URL store: 'exact' hashes, a 'bloom' filter or a shared 'sqlite' table."""
+    if kind == "exact":
+        return HashedURLSet(capacity, path)
+    if kind == "bloom":
+        return BloomURLSet(capacity, error_rate, path)
+    if kind == "sqlite":
+        return SQLiteSeenStore(path or "seen.sqlite3")
+    raise ValueError(f"Unknown URL store '{kind}', expected 'exact', 'bloom' or 'sqlite'")
@@ -48,13 +48,15 @@ def dump_all_tables_with_count(database_path):
                 cursor.execute(f"SELECT * FROM {table_name}")
                 column_names = [description[0] for description in cursor.description]
 
-            # Fetch rows and print results
-            rows = cursor.fetchall()
             print(f"Columns: {', '.join(column_names)}")
 
-            # Print each row
-            for row in rows:
-                print(row)
+            # Print rows as the cursor steps through them instead of loading the table
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for row in rows:
+                    print(row)
 
         # Close the database connection
         cursor.close()
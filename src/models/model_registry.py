@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
+
+DEFAULT_MODEL = "en_core_web_md"
+
+# Per-process registry of loaded models
+_models = {}
+_load_stats = {}
+_lock = threading.Lock()
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in KB on Linux
+    return round(usage / 1024, 1)
+
+
+def _load_model(model_name):
+    # spaCy takes seconds to import, so only processes that load a model pay for it
+    import spacy
+    from spacy.util import is_package
+
+    if not is_package(model_name):
+        print(f"Model '{model_name}' not found. Downloading...")
+        from spacy.cli import download
+        download(model_name)
+    return spacy.load(model_name)
+
+
+def get_spacy_model(model_name=DEFAULT_MODEL):
+    """Return the process-wide spaCy model, loading it on first use only."""
+    nlp = _models.get(model_name)
+    if nlp is not None:
+        return nlp
+
+    with _lock:
+        # Another thread may have finished loading while we waited on the lock
+        if model_name in _models:
+            return _models[model_name]
+        try:
+            rss_before = _peak_rss_mb()
+            start = time.perf_counter()
+            nlp = _load_model(model_name)
+            load_sec = time.perf_counter() - start
+        except Exception as e:
+            print(f"Error loading SpaCy model '{model_name}': {e}")
+            raise
+
+        rss_after = _peak_rss_mb()
+        _models[model_name] = nlp
+        _load_stats[model_name] = {
+            "load_sec": round(load_sec, 3),
+            "loads": _load_stats.get(model_name, {}).get("loads", 0) + 1,
+            "peak_rss_before_mb": rss_before,
+            "peak_rss_after_mb": rss_after,
+        }
+        logging.info(f"Loaded spaCy model '{model_name}' in {load_sec:.2f} seconds "
+                     f"(peak RSS {rss_before} MB -> {rss_after} MB)")
+        return nlp
+
+
+def preload(model_name=DEFAULT_MODEL):
+    """Load the model and run both text pipeline profiles once, e.g. from a worker_init hook."""
+    # Imported here: text_pipeline imports this module
+    from src.models.text_pipeline import PROFILES, process_texts
+    get_spacy_model(model_name)
+    for profile in PROFILES:
+        list(process_texts(["Warm up the pipeline on one short sentence."], profile=profile, model_name=model_name))
+    return model_stats(model_name)
+
+
+def model_stats(model_name=DEFAULT_MODEL):
+    """Load time and memory figures for a model, plus the current peak RSS."""
+    stats = dict(_load_stats.get(model_name, {"loads": 0}))
+    stats["loaded"] = model_name in _models
+    stats["peak_rss_now_mb"] = _peak_rss_mb()
+    return stats
@@ -0,0 +1,73 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+import numpy as np
+
+DEFAULT_TABLE_DIR = "relevance_tables"
+
+
+def table_path(keyword, model_name, model_version, directory=DEFAULT_TABLE_DIR):
+    """File holding the relevance table of a keyword for one version of a model.
+
+    The version is part of the name because an upgraded model with the same
+    number of vectors would otherwise pass load_table's shape check and be
+    scored with the old model's table.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", keyword.lower()).strip("_")[:40] or "keyword"
+    digest = hashlib.blake2b(f"{model_name}\0{model_version}\0{keyword}".encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(directory, f"relevance_{model_name}-{model_version}_{slug}_{digest}.npy")
+
+
+def build_table(path, keyword_vector, keyword_norm, vectors_data, chunk_rows=65536):
+    """Write the keyword's cosine similarity to every row of the vector table.
+
+    The result is a float32 .npy file with one entry per row, NaN for rows whose
+    vector is all zeros. It is written in chunks and renamed into place, so
+    several processes building it at once never see a partial file.
+    """
+    data = np.asarray(vectors_data)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp.npy", dir=directory or None)
+    os.close(fd)
+    try:
+        table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(data),))
+        for start in range(0, len(data), chunk_rows):
+            matrix = data[start:start + chunk_rows]
+            norms = np.linalg.norm(matrix, axis=1)
+            nonzero = norms > 0
+            if keyword_norm == 0:
+                scores = np.zeros(len(matrix), dtype=np.float32)
+            else:
+                scores = (matrix @ keyword_vector).astype(np.float32)
+                scores[nonzero] /= norms[nonzero] * keyword_norm
+            scores[~nonzero] = np.nan
+            table[start:start + len(matrix)] = scores
+        table.flush()
+        del table
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    logging.info(f"Built relevance table {path} with {len(data)} rows")
+    return load_table(path, len(data))
+
+
+def load_table(path, n_rows):
+    """Map a relevance table read-only, or return None if it is missing or stale.
+
+    Every process mapping the same file shares its pages through the OS page
+    cache, so worker processes add no memory per copy.
+    """
+    try:
+        table = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if table.dtype != np.float32 or table.shape != (n_rows,):
+        logging.warning(f"Ignoring relevance table {path}: shape {table.shape}, expected ({n_rows},)")
+        return None
+    return table
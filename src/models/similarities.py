@@ -1,58 +1,32 @@
-import spacy
-from spacy.util import is_package
-from spacy_cleaner import processing, Cleaner
+from src.models.similarity_engine import get_engine, get_multi_engine
+from src.models.text_pipeline import process_texts
 
-def get_spacy_model(model_name="en_core_web_md"):
-    try:
-        if not is_package(model_name):
-            print(f"Model '{model_name}' not found. Downloading...")
-            from spacy.cli import download
-            download(model_name)
-        return spacy.load(model_name)
-    except Exception as e:
-        print(f"Error loading SpaCy model '{model_name}': {e}")
-        raise
+def clean_html(group, keyWord, batch_size=1000, n_process=1, use_table=True):
+    # Only the lemmatizer's inputs run; vectors come from the lemma's vocab entry
+    records = process_texts([t for t in group if len(t) > 1], profile="lemmas",
+                            batch_size=batch_size, n_process=n_process)
+    if isinstance(keyWord, str):
+        scores = get_engine(keyWord, use_table=use_table).score_records(records)
+        return [value for values in scores for value in values]
+    # Several keywords: one list of values per keyword, all from one scoring pass
+    scores = get_multi_engine(keyWord, use_table=use_table).score_records(records)
+    return [[value for values in scores for value in values[:, i].tolist()] for i in range(len(keyWord))]
 
-def clean_html(group, keyWord):
-    nlp = get_spacy_model('en_core_web_md')
+def get_scorer(keywords, use_table=True):
+    """Engine for one keyword (a str) or for several at once (a list)."""
+    if isinstance(keywords, str):
+        return get_engine(keywords, use_table=use_table)
+    return get_multi_engine(keywords, use_table=use_table)
 
-    cleaner = Cleaner(
-        nlp,
-        processing.remove_stopword_token,
-        processing.remove_punctuation_token,
-        processing.remove_email_token,
-        processing.replace_email_token,
-        processing.replace_url_token,
-        processing.mutate_lemma_token,
-    )
-
-    words = cleaner.clean([t for t in group if len(t) > 1])
-    base_token = nlp(keyWord)
-    doc = nlp(" ".join(words))
-    to_return = []
-    for token in doc:
-        if token and token.vector_norm:
-            to_return.append(base_token.similarity(token))
-    return to_return
-def clean_words(group):
+def clean_words(group, batch_size=256, n_process=1):
     if not group or not isinstance(group, list):
         print("Invalid input to clean_words: Expected a list of tuples.")
         return []
 
-    nlp = get_spacy_model('en_core_web_md')
-
-    cleaner = Cleaner(
-        nlp,
-        processing.remove_stopword_token,
-        processing.remove_punctuation_token,
-        processing.remove_email_token,
-        processing.replace_email_token,
-        processing.replace_url_token,
-        processing.mutate_lemma_token,
-    )
-
     try:
-        words = cleaner.clean([t[1] for t in group if len(t) > 1])
+        records = process_texts([t[1] for t in group if len(t) > 1], profile="lemmas",
+                                batch_size=batch_size, n_process=n_process)
+        words = [record.text for record in records]
     except Exception as e:
         print(f"Error during cleaning words: {e}")
         return []
@@ -72,16 +46,26 @@ def calculate_similarities(words, base_word):
         return words[0] if words else None, []
 
     try:
-        nlp = get_spacy_model('en_core_web_md')
-        base_token = nlp(base_word)
-        doc = nlp(words[1])
-
-        to_return = []
-        for token in doc:
-            if token and token.vector_norm:
-                to_return.append(base_token.similarity(token))
-
-        return words[0], to_return
+        return words[0], get_scorer(base_word).score_texts([words[1]])[0]
     except Exception as e:
         print(f"Error in calculate_similarities for {words}: {e}")
         return words[0], []
+
+def batch_similarities(pairs, base_word, use_table=True):
+    """Score every (url, snippet) pair on a page with one matrix-vector product.
+
+    ``base_word`` may also be a list of keywords; each pair's values are then
+    an array with one column per keyword, from a single matrix product.
+    """
+    valid = [pair for pair in pairs if pair and len(pair) >= 2]
+    if len(valid) < len(pairs):
+        print(f"Skipping {len(pairs) - len(valid)} invalid inputs to batch_similarities")
+    if not valid:
+        return []
+
+    try:
+        scores = get_scorer(base_word, use_table).score_texts([snippet for _, snippet in valid])
+    except Exception as e:
+        print(f"Error in batch_similarities for {len(valid)} snippets: {e}")
+        return [(url, []) for url, _ in valid]
+    return [(url, values) for (url, _), values in zip(valid, scores)]
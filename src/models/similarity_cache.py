@@ -0,0 +1,164 @@
+import glob
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 200_000
+
+# Scoring worker processes save next to the main file, one file per process
+WORKER_SUFFIX = ".worker-"
+
+# Process-wide cache used by every SimilarityEngine unless one is passed in
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+class SimilarityCache:
+    """Bounded LRU cache of keyword/token similarities.
+
+    Entries are keyed by ``(keyword, vector row)``: every token form that maps to
+    the same row of the vector table shares one entry, so inflections of a
+    common word are only ever scored once per keyword.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._merged = []  # Worker files folded into this cache, removed on the next save to path
+        if path:
+            self.load(path)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_many(self, keyword, rows):
+        """Return {row: score} for the cached rows, counting hits and misses."""
+        found = {}
+        with self._lock:
+            for row in rows:
+                key = (keyword, row)
+                value = self._data.get(key)
+                if value is None:
+                    self.misses += 1
+                    continue
+                self._data.move_to_end(key)
+                found[row] = value
+                self.hits += 1
+        return found
+
+    def put_many(self, keyword, rows, scores):
+        with self._lock:
+            for row, score in zip(rows, scores):
+                key = (keyword, row)
+                self._data[key] = score
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self, path=None):
+        """Write the entries to disk, least recently used first.
+
+        Saving to the cache's own path also removes the worker files merged
+        into it by load(), since their entries are now in the main file.
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            items = list(self._data.items())
+            merged = self._merged if path == self.path else []
+            if merged:
+                self._merged = []
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(items, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        for worker_file in merged:
+            try:
+                os.remove(worker_file)
+            except OSError:
+                pass
+        logging.info(f"Saved {len(items)} similarity cache entries to {path}")
+
+    def load(self, path=None):
+        """Load entries written by save(), keeping at most maxsize of the newest.
+
+        Files saved by scoring worker processes (see ``worker_cache_path``)
+        are merged in after the main file, oldest first.
+        """
+        path = path or self.path
+        worker_files = sorted(glob.glob(glob.escape(path) + WORKER_SUFFIX + "*"), key=_mtime)
+        for source in ([path] if os.path.exists(path) else []) + worker_files:
+            try:
+                with open(source, "rb") as file:
+                    items = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logging.error(f"Failed to load similarity cache from {source}: {e}")
+                continue
+            with self._lock:
+                self._data.update(items[-self.maxsize:])
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        with self._lock:
+            if path == self.path:
+                self._merged = worker_files
+        logging.info(f"Loaded {len(self._data)} similarity cache entries from {path} "
+                     f"and {len(worker_files)} worker files")
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def worker_cache_path(path, pid=None):
+    """File a scoring worker process saves its cache to; merged by the next load of ``path``."""
+    return f"{path}{WORKER_SUFFIX}{pid if pid is not None else os.getpid()}"
+
+
+def configure_similarity_cache(maxsize=DEFAULT_MAXSIZE, path=None):
+    """Set up the process-wide cache, warming it from ``path`` if it exists.
+
+    Calling this again with the same settings keeps the existing warm cache.
+    """
+    global _default_cache
+    with _default_lock:
+        current = _default_cache
+        if current is None or current.path != path or current.maxsize != maxsize:
+            _default_cache = SimilarityCache(maxsize, path)
+        return _default_cache
+
+
+def get_similarity_cache():
+    """Return the process-wide cache, creating an in-memory one on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SimilarityCache()
+        return _default_cache
@@ -0,0 +1,251 @@
+import threading
+
+import numpy as np
+
+from src.models.model_registry import DEFAULT_MODEL, get_spacy_model
+from src.models.relevance_table import DEFAULT_TABLE_DIR, build_table, load_table, table_path
+from src.models.similarity_cache import get_similarity_cache
+from src.models.text_pipeline import process_texts
+
+# Engines are cheap to keep around and the keyword rarely changes during a crawl
+_engines = {}
+_lock = threading.Lock()
+
+
+class SimilarityEngine:
+    """Score many tokens against one keyword with a single matrix-vector product.
+
+    Produces the same values as calling ``nlp(keyword).similarity(token)`` for
+    every token that has a vector, which is what the per-token loops did.
+    When a precomputed relevance table exists for the keyword, scores are read
+    from it by vector row instead and no vector math happens at all.
+    """
+
+    def __init__(self, keyword, model_name=DEFAULT_MODEL, cache=None, use_cache=True, use_table=True,
+                 table_dir=DEFAULT_TABLE_DIR):
+        self.keyword = keyword
+        self.model_name = model_name
+        self.cache = cache  # Falls back to the process-wide SimilarityCache
+        self.use_cache = use_cache
+        self.nlp = get_spacy_model(model_name)
+        self.vectors = self.nlp.vocab.vectors
+
+        base = self.nlp(keyword)
+        self.keyword_vector = np.asarray(base.vector, dtype=np.float32)
+        self.keyword_norm = float(base.vector_norm)
+        # Doc.similarity short-circuits to 1.0 when a one-token keyword meets itself
+        self.keyword_orth = base[0].orth if len(base) == 1 else None
+
+        self.use_table = use_table
+        self.table_path = table_path(keyword, model_name, self.nlp.meta.get("version", "0"), table_dir)
+        self.table = load_table(self.table_path, len(self.vectors.data)) if use_table else None
+        self._table_lock = threading.Lock()
+
+    def score_records(self, records):
+        """Return one list of similarity values per TokenRecords, computed in one batch."""
+        all_keys, all_rows, offsets = [], [], [0]
+        for record in records:
+            keep = record.rows >= 0
+            all_keys.append(record.keys[keep])
+            all_rows.append(record.rows[keep])
+            offsets.append(offsets[-1] + int(keep.sum()))
+
+        if offsets[-1] == 0:
+            return [[] for _ in range(len(offsets) - 1)]
+
+        keys = np.concatenate(all_keys)
+        rows = np.concatenate(all_rows)
+        return self._split(self.score_rows(rows, keys), offsets)
+
+    def precompute_table(self):
+        """Load the keyword's relevance table, building it first if needed; returns it."""
+        # Threads of one process build it once; build_table keeps other processes from seeing a partial file
+        with self._table_lock:
+            if self.table is None:
+                self.table = load_table(self.table_path, len(self.vectors.data))
+            if self.table is None:
+                self.table = build_table(self.table_path, self.keyword_vector, self.keyword_norm, self.vectors.data)
+            return self.table
+
+    def score_rows(self, rows, keys=None):
+        """Cosine similarity of the keyword against the given vector table rows.
+
+        With a relevance table this is a lookup. Otherwise each distinct row is
+        scored once, and rows already in the similarity cache skip the vector
+        math entirely.
+        """
+        if self.table is not None:
+            scores = np.asarray(self.table[rows], dtype=np.float32)
+            self._mark_keyword(scores, keys)
+            return scores
+
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        unique_scores = np.empty(len(unique_rows), dtype=np.float32)
+
+        cache = self.get_cache()
+        found = cache.get_many(self.keyword, unique_rows.tolist()) if cache is not None else {}
+        missing = np.array([row not in found for row in unique_rows.tolist()], dtype=bool)
+        for i in np.flatnonzero(~missing):
+            unique_scores[i] = found[int(unique_rows[i])]
+
+        if missing.any():
+            computed = self._cosine(unique_rows[missing])
+            unique_scores[missing] = computed
+            if cache is not None:
+                cache.put_many(self.keyword, unique_rows[missing].tolist(), computed.tolist())
+
+        scores = unique_scores[inverse]
+        self._mark_keyword(scores, keys)
+        return scores
+
+    def _mark_keyword(self, scores, keys):
+        if self.keyword_orth is not None and keys is not None:
+            scores[(keys == self.keyword_orth) & ~np.isnan(scores)] = 1.0
+
+    def _cosine(self, rows):
+        matrix = np.asarray(self.vectors.data)[rows]
+        norms = np.linalg.norm(matrix, axis=1)
+        # Tokens whose vector is all zeros are skipped, matching the vector_norm check
+        nonzero = norms > 0
+
+        if self.keyword_norm == 0:
+            scores = np.zeros(len(rows), dtype=np.float32)
+        else:
+            scores = (matrix @ self.keyword_vector).astype(np.float32)
+            scores[nonzero] /= norms[nonzero] * self.keyword_norm
+        scores[~nonzero] = np.nan
+        return scores
+
+    def vocabulary(self, size=50):
+        """The keyword plus up to ``size`` vocabulary words nearest to it, as {word: similarity}.
+
+        Cheap lexical matching against these words approximates the vector score
+        well enough to decide which texts are worth scoring properly.
+        """
+        words = {self.keyword.lower(): 1.0}
+        if self.keyword_norm == 0 or size <= 0 or not len(self.vectors):
+            return words
+        # Ask for extra neighbours: many are case or inflection variants of one another
+        keys, _, scores = self.vectors.most_similar(self.keyword_vector[None, :], n=min(size * 3, len(self.vectors)))
+        strings = self.nlp.vocab.strings
+        for key, score in zip(keys[0].tolist(), scores[0].tolist()):
+            try:
+                word = strings[key].lower()
+            except KeyError:
+                continue
+            if word.isalpha() and word not in words:
+                words[word] = float(score)
+                if len(words) > size:
+                    break
+        return words
+
+    def get_cache(self):
+        if not self.use_cache:
+            return None
+        return self.cache if self.cache is not None else get_similarity_cache()
+
+    def score_texts(self, texts, batch_size=256, n_process=1):
+        """Tokenize the texts (tokenizer only) and score every token that has a vector."""
+        records = process_texts(texts, profile="vectors", clean=False, batch_size=batch_size,
+                                n_process=n_process, model_name=self.model_name)
+        return self.score_records(records)
+
+    @staticmethod
+    def _split(scores, offsets):
+        result = []
+        for start, end in zip(offsets, offsets[1:]):
+            chunk = scores[start:end]
+            result.append(chunk[~np.isnan(chunk)].tolist())
+        return result
+
+
+def get_engine(keyword, model_name=DEFAULT_MODEL, use_table=True):
+    """Return the cached engine for a keyword, building it once per process.
+
+    With ``use_table=False`` the engine never maps a relevance table, even one
+    left on disk by an earlier crawl.
+    """
+    key = (model_name, keyword, use_table)
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = SimilarityEngine(keyword, model_name, use_table=use_table)
+                _engines[key] = engine
+    return engine
+
+
+class MultiKeywordEngine:
+    """Score tokens against several keywords at once.
+
+    Scores come back as an (n tokens, n keywords) array from one matrix product
+    with the stacked keyword vectors, or from the keywords' relevance tables
+    when they all have one, so each extra keyword adds a column rather than
+    another pass over the page.
+    """
+
+    def __init__(self, keywords, model_name=DEFAULT_MODEL, use_table=True):
+        self.keywords = list(keywords)
+        self.model_name = model_name
+        self.engines = [get_engine(keyword, model_name, use_table) for keyword in self.keywords]
+        self.vectors = self.engines[0].vectors
+        self.keyword_matrix = np.stack([engine.keyword_vector for engine in self.engines])
+        self.keyword_norms = np.array([engine.keyword_norm for engine in self.engines], dtype=np.float32)
+
+    def score_rows(self, rows, keys=None):
+        """(len(rows), n keywords) cosine similarities; rows without a vector are NaN."""
+        if all(engine.table is not None for engine in self.engines):
+            scores = np.stack([np.asarray(engine.table[rows], dtype=np.float32) for engine in self.engines], axis=1)
+        else:
+            unique_rows, inverse = np.unique(rows, return_inverse=True)
+            matrix = np.asarray(self.vectors.data)[unique_rows]
+            norms = np.linalg.norm(matrix, axis=1)
+            nonzero = norms > 0
+            unique_scores = (matrix @ self.keyword_matrix.T).astype(np.float32)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                unique_scores /= norms[:, None] * self.keyword_norms[None, :]
+            unique_scores[:, self.keyword_norms == 0] = 0.0
+            unique_scores[~nonzero] = np.nan
+            scores = unique_scores[inverse]
+        for column, engine in enumerate(self.engines):
+            engine._mark_keyword(scores[:, column], keys)
+        return scores
+
+    def score_records(self, records):
+        """One (tokens with a vector, n keywords) array per TokenRecords."""
+        all_keys, all_rows, offsets = [], [], [0]
+        for record in records:
+            keep = record.rows >= 0
+            all_keys.append(record.keys[keep])
+            all_rows.append(record.rows[keep])
+            offsets.append(offsets[-1] + int(keep.sum()))
+
+        empty = np.empty((0, len(self.keywords)), dtype=np.float32)
+        if offsets[-1] == 0:
+            return [empty for _ in range(len(offsets) - 1)]
+
+        scores = self.score_rows(np.concatenate(all_rows), np.concatenate(all_keys))
+        result = []
+        for start, end in zip(offsets, offsets[1:]):
+            chunk = scores[start:end]
+            result.append(chunk[~np.isnan(chunk).any(axis=1)])
+        return result
+
+    def score_texts(self, texts, batch_size=256, n_process=1):
+        """Tokenize the texts (tokenizer only) and score every token against every keyword."""
+        records = process_texts(texts, profile="vectors", clean=False, batch_size=batch_size,
+                                n_process=n_process, model_name=self.model_name)
+        return self.score_records(records)
+
+
+def get_multi_engine(keywords, model_name=DEFAULT_MODEL, use_table=True):
+    """Return the cached engine for a list of keywords, building it once per process."""
+    key = (model_name, tuple(keywords), use_table)
+    engine = _engines.get(key)
+    if engine is None:
+        # Built outside the lock: get_engine takes it for every keyword
+        engine = MultiKeywordEngine(keywords, model_name, use_table)
+        with _lock:
+            engine = _engines.setdefault(key, engine)
+    return engine
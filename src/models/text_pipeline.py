@@ -0,0 +1,77 @@
+import numpy as np
+
+from src.models.model_registry import DEFAULT_MODEL, get_spacy_model
+
+# Pipeline components each use actually needs. Static vectors and stopword flags
+# come straight from the vocab, so they only need the tokenizer; lemmas need the
+# tagger and attribute ruler to feed the rule-based lemmatizer.
+PROFILES = {
+    "vectors": (),
+    "lemmas": ("tok2vec", "tagger", "attribute_ruler", "lemmatizer"),
+}
+
+URL_PLACEHOLDER = "_URL_"
+
+
+class TokenRecords:
+    """Compact per-token result for one text: lemma, stopword flag and vector row."""
+
+    __slots__ = ("lemmas", "keys", "is_stop", "rows")
+
+    def __init__(self, lemmas, keys, is_stop, rows):
+        self.lemmas = lemmas
+        self.keys = keys
+        self.is_stop = is_stop
+        self.rows = rows
+
+    @property
+    def text(self):
+        return " ".join(self.lemmas)
+
+    def __len__(self):
+        return len(self.lemmas)
+
+
+def _disabled_components(nlp, profile):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown pipeline profile '{profile}', expected one of {tuple(PROFILES)}")
+    enabled = PROFILES[profile]
+    return [name for name in nlp.pipe_names if name not in enabled]
+
+
+def records_from_doc(doc, clean=True):
+    """Build TokenRecords for a doc, optionally applying the Cleaner rules.
+
+    Cleaning mirrors the Cleaner we used before: drop stopwords, punctuation and
+    emails, replace URLs with a placeholder and keep the lemma of the rest.
+    """
+    vocab = doc.vocab
+    lemmas, keys, is_stop = [], [], []
+    for token in doc:
+        if clean and (token.is_stop or token.is_punct or token.like_email):
+            continue
+        if clean and token.like_url:
+            lemma, key = URL_PLACEHOLDER, vocab.strings[URL_PLACEHOLDER]
+        elif token.lemma_:
+            lemma, key = token.lemma_, token.lemma
+        else:
+            lemma, key = token.text, token.orth
+        lemmas.append(lemma)
+        keys.append(key)
+        is_stop.append(token.is_stop)
+
+    keys = np.asarray(keys, dtype=np.uint64)
+    if len(keys):
+        rows = np.asarray(vocab.vectors.find(keys=keys), dtype=np.int64)
+    else:
+        rows = np.empty(0, dtype=np.int64)
+    return TokenRecords(lemmas, keys, np.asarray(is_stop, dtype=bool), rows)
+
+
+def process_texts(texts, profile="lemmas", clean=True, batch_size=256, n_process=1,
+                  model_name=DEFAULT_MODEL):
+    """Stream texts through nlp.pipe with only the components the profile needs."""
+    nlp = get_spacy_model(model_name)
+    disable = _disabled_components(nlp, profile)
+    for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable):
+        yield records_from_doc(doc, clean)
@@ -1,35 +1,176 @@
-import heapq
+import itertools
+
+# Slots of an entry list: [score, seq, url, position in max heap, position in min heap]
+_SCORE, _SEQ, _URL, _MAX_POS, _MIN_POS = range(5)
+
+
+class _IndexedHeap:
+    """Binary heap of entries that records each entry's position inside it.
+
+    Knowing the position makes removing or re-prioritising an arbitrary entry
+    O(log n). Entries are ordered by (score, -seq), so among tied scores the one
+    inserted first counts as the larger.
+    """
+
+    def __init__(self, pos_slot, largest_first):
+        self.items = []
+        self.pos_slot = pos_slot
+        self.largest_first = largest_first
+
+    def __len__(self):
+        return len(self.items)
+
+    def _before(self, a, b):
+        key_a = (a[_SCORE], -a[_SEQ])
+        key_b = (b[_SCORE], -b[_SEQ])
+        return key_a > key_b if self.largest_first else key_a < key_b
+
+    def _place(self, entry, index):
+        self.items[index] = entry
+        entry[self.pos_slot] = index
+
+    def _sift_up(self, index):
+        items = self.items
+        entry = items[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if not self._before(entry, items[parent]):
+                break
+            self._place(items[parent], index)
+            index = parent
+        self._place(entry, index)
+
+    def _sift_down(self, index):
+        items = self.items
+        size = len(items)
+        entry = items[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and self._before(items[child + 1], items[child]):
+                child += 1
+            if not self._before(items[child], entry):
+                break
+            self._place(items[child], index)
+            index = child
+        self._place(entry, index)
+
+    def push(self, entry):
+        self.items.append(entry)
+        self._sift_up(len(self.items) - 1)
+
+    def peek(self):
+        return self.items[0]
+
+    def remove(self, entry):
+        index = entry[self.pos_slot]
+        last = self.items.pop()
+        if last is not entry:
+            self._place(last, index)
+            self.fix(last)
+        entry[self.pos_slot] = -1
+
+    def fix(self, entry):
+        """Restore heap order after an entry's score changed."""
+        index = entry[self.pos_slot]
+        self._sift_up(index)
+        if entry[self.pos_slot] == index:
+            self._sift_down(index)
+
 
 class TopValues:
+    """Bounded priority queue that keeps the ``capacity`` highest-scoring URLs.
+
+    Values are added as ``(url, score)`` and come back as ``(score, url)``.
+    Membership is O(1); add, pop_highest, pop_lowest, update and remove are
+    O(log n). Among equal scores the URL added first ranks higher, and it is
+    the most recently added one that gets evicted when the queue is full.
+    """
+
     def __init__(self, capacity):
         self.capacity = capacity
-        self.heap = []
+        self._entries = {}  # url -> entry
+        self._max_heap = _IndexedHeap(_MAX_POS, largest_first=True)
+        self._min_heap = _IndexedHeap(_MIN_POS, largest_first=False)
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return url in self._entries
+
+    @property
+    def heap(self):
+        """The stored values as (score, url) tuples, in no particular order."""
+        return [(entry[_SCORE], entry[_URL]) for entry in self._entries.values()]
 
     def add(self, value):
-        if value[0] in [t[1] for t in self.heap]:
+        """Add a (url, score) pair; URLs already present are ignored."""
+        url, score = value[0], value[1]
+        if url in self._entries or self.capacity <= 0:
             return
 
-        if len(self.heap) < self.capacity:
-            heapq.heappush(self.heap, (value[1], value[0]))
-        else:
-            heapq.heappushpop(self.heap, (value[1], value[0]))
+        entry = [score, next(self._counter), url, -1, -1]
+        if len(self._entries) >= self.capacity:
+            lowest = self._min_heap.peek()
+            # A newcomer loses ties against what is already stored
+            if (score, -entry[_SEQ]) <= (lowest[_SCORE], -lowest[_SEQ]):
+                return
+            self._discard(lowest)
+
+        self._entries[url] = entry
+        self._max_heap.push(entry)
+        self._min_heap.push(entry)
 
     def get_top_values(self):
-        return sorted(self.heap, reverse=True)
+        return [(entry[_SCORE], entry[_URL])
+                for entry in sorted(self._entries.values(), key=lambda e: (e[_SCORE], -e[_SEQ]), reverse=True)]
+
+    def update(self, url, score):
+        """Change the score of a stored URL; returns False if it is not stored."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return False
+        entry[_SCORE] = score
+        self._max_heap.fix(entry)
+        self._min_heap.fix(entry)
+        return True
+
+    def remove(self, url):
+        """Remove a URL; returns False if it is not stored."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return False
+        self._discard(entry)
+        return True
 
     def remove_from_heap(self, value):
-        try:
-            index = self.heap.index(value)
-            self.heap[index] = self.heap[-1]
-            self.heap.pop()
-            if index < len(self.heap):
-                heapq._siftup(self.heap, index)
-                heapq._siftdown(self.heap, 0, index)
-        except ValueError:
-            pass
+        """Remove a (score, url) value if it is stored with that score."""
+        entry = self._entries.get(value[1])
+        if entry is not None and entry[_SCORE] == value[0]:
+            self._discard(entry)
+
+    def peek_highest(self):
+        entry = self._max_heap.peek()
+        return entry[_SCORE], entry[_URL]
 
     def pop_highest(self):
-        if self.heap:
-            to_return = heapq.nlargest(1, self.heap).pop()
-            self.remove_from_heap(to_return)   
-        return to_return
+        if not self._entries:
+            raise IndexError("pop from an empty TopValues")
+        entry = self._max_heap.peek()
+        self._discard(entry)
+        return entry[_SCORE], entry[_URL]
+
+    def pop_lowest(self):
+        if not self._entries:
+            raise IndexError("pop from an empty TopValues")
+        entry = self._min_heap.peek()
+        self._discard(entry)
+        return entry[_SCORE], entry[_URL]
+
+    def _discard(self, entry):
+        del self._entries[entry[_URL]]
+        self._max_heap.remove(entry)
+        self._min_heap.remove(entry)